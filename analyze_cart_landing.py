@@ -5,6 +5,8 @@ import requests
 import json
 import re
 
+from backend.html_scan import extract_assigned, loads
+
 url = "https://m.shein.com/za/cart/share/landing?group_id=629363735&local_country=ZA&url_from=&cart_share=1"
 
 headers = {
@@ -19,22 +21,23 @@ print(f"Status: {response.status_code}")
 print(f"Content-Type: {response.headers.get('Content-Type')}")
 print(f"Length: {len(response.text)}\n")
 
-# Search for cart data patterns
+# Search for cart data patterns (matched up to the `=`; the value is cut out
+# with a bracket-balanced scan)
 patterns = [
-    (r'window\.__INITIAL_STATE__\s*=\s*(\{.+?\});', 'window.__INITIAL_STATE__'),
-    (r'window\.__NUXT__\s*=\s*(.+?);', 'window.__NUXT__'),
-    (r'window\.gbRawData\s*=\s*(\{.+?\});', 'window.gbRawData'),
-    (r'var\s+cartData\s*=\s*(\{.+?\});', 'cartData'),
-    (r'var\s+productList\s*=\s*(\[.+?\]);', 'productList'),
+    (re.compile(r'window\.__INITIAL_STATE__\s*=\s*'), 'window.__INITIAL_STATE__'),
+    (re.compile(r'window\.__NUXT__\s*=\s*'), 'window.__NUXT__'),
+    (re.compile(r'window\.gbRawData\s*=\s*'), 'window.gbRawData'),
+    (re.compile(r'var\s+cartData\s*=\s*'), 'cartData'),
+    (re.compile(r'var\s+productList\s*=\s*'), 'productList'),
 ]
 
 found = False
 for pattern, name in patterns:
-    match = re.search(pattern, response.text, re.DOTALL)
-    if match:
+    raw = extract_assigned(response.text, pattern)
+    if raw:
         print(f"✓ Found {name}")
         try:
-            data = json.loads(match.group(1))
+            data = loads(raw)
             print(f"  Type: {type(data)}")
             if isinstance(data, dict):
                 print(f"  Keys: {list(data.keys())[:10]}")
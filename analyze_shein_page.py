@@ -6,6 +6,8 @@ import json
 import re
 import sys
 
+from backend.html_scan import extract_assigned, loads
+
 url = sys.argv[1] if len(sys.argv) > 1 else "https://api-shein.shein.com/h5/sharejump/appjump?link=lbCieue0XMV_b&localcountry=ZA"
 
 headers = {
@@ -16,31 +18,32 @@ print(f"Analyzing URL: {url}\n")
 
 response = requests.get(url, headers=headers, timeout=10, allow_redirects=True)
 
-# Look for common JavaScript data patterns
+# Look for common JavaScript data patterns (each one matches up to the `=`;
+# the value itself is cut out with a bracket-balanced scan)
 patterns = [
-    (r'window\.__INITIAL_STATE__\s*=\s*({.+?});', "window.__INITIAL_STATE__"),
-    (r'window\.gbRawData\s*=\s*({.+?});', "window.gbRawData"),
-    (r'window\.__CART_DATA__\s*=\s*({.+?});', "window.__CART_DATA__"),
-    (r'cartData\s*=\s*({.+?});', "cartData"),
-    (r'var\s+productList\s*=\s*(\[.+?\]);', "productList"),
-    (r'var\s+goods\s*=\s*(\[.+?\]);', "goods"),
+    (re.compile(r'window\.__INITIAL_STATE__\s*=\s*'), "window.__INITIAL_STATE__"),
+    (re.compile(r'window\.gbRawData\s*=\s*'), "window.gbRawData"),
+    (re.compile(r'window\.__CART_DATA__\s*=\s*'), "window.__CART_DATA__"),
+    (re.compile(r'cartData\s*=\s*'), "cartData"),
+    (re.compile(r'var\s+productList\s*=\s*'), "productList"),
+    (re.compile(r'var\s+goods\s*=\s*'), "goods"),
 ]
 
 print("Searching for embedded JavaScript data...\n")
 
 found_data = False
 for pattern, name in patterns:
-    matches = re.search(pattern, response.text, re.DOTALL)
-    if matches:
+    raw = extract_assigned(response.text, pattern)
+    if raw:
         print(f"✓ Found: {name}")
         try:
-            data = json.loads(matches.group(1))
+            data = loads(raw)
             print(f"  Preview: {json.dumps(data, indent=2)[:500]}...")
             print()
             found_data = True
         except json.JSONDecodeError as e:
             print(f"  ✗ Error parsing JSON: {e}")
-            print(f"  Raw data preview: {matches.group(1)[:200]}")
+            print(f"  Raw data preview: {raw[:200]}")
             print()
 
 if not found_data:
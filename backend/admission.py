@@ -0,0 +1,82 @@
+"""
+Admission control for browser sessions
+
+Chromium is the memory hog on our 1 GB machine, so the number of concurrent
+browser sessions is capped. Requests beyond the cap wait in a bounded queue
+for at most `max_wait` seconds; when the queue is full (or the wait runs out)
+they are rejected straight away with a Retry-After hint instead of piling up
+until the VM is OOM-killed.
+"""
+
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+
+class Overloaded(Exception):
+    """The server is at capacity; maps to an HTTP 429/503 with Retry-After"""
+
+    def __init__(self, status_code: int, retry_after: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.detail = detail
+
+
+class AdmissionController:
+    def __init__(self, limit: int, max_queue: int = 10, max_wait: Optional[float] = 20):
+        self.limit = max(1, limit)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._semaphore = asyncio.Semaphore(self.limit)
+        self.active = 0
+        self.waiting = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        # Moving average of how long a session holds its slot
+        self._avg_hold = 10.0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one browser-session slot for the duration of the block"""
+        if not self._semaphore.locked():
+            # Free slot: acquire() returns without suspending
+            await self._semaphore.acquire()
+        else:
+            if self.waiting >= self.max_queue:
+                self.rejected_full += 1
+                raise Overloaded(429, self.retry_after(), "Too many scrapes in progress, try again shortly")
+
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.max_wait)
+            except asyncio.TimeoutError:
+                self.rejected_timeout += 1
+                raise Overloaded(503, self.retry_after(), "Timed out waiting for a free browser")
+            finally:
+                self.waiting -= 1
+
+        self.active += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+            self._avg_hold = 0.8 * self._avg_hold + 0.2 * (time.monotonic() - started)
+
+    def retry_after(self) -> int:
+        """Seconds until the queue ahead of a new request should have drained"""
+        return max(1, math.ceil(self._avg_hold * (self.waiting + 1) / self.limit))
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_queue": self.max_queue,
+            "rejected_full": self.rejected_full,
+            "rejected_timeout": self.rejected_timeout,
+        }
@@ -0,0 +1,240 @@
+"""
+Warm Chromium pool for the scraper backend
+
+Browsers are launched once (from the FastAPI lifespan hook) and reused.
+Every scrape gets its own fresh BrowserContext, so cookies/storage never
+leak between carts, while the expensive browser process stays warm.
+"""
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+import metrics
+from admission import AdmissionController
+
+try:
+    from playwright.async_api import async_playwright
+except ImportError:
+    async_playwright = None
+
+
+logger = logging.getLogger(__name__)
+
+CHROMIUM_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--disable-dev-shm-usage',
+    '--no-sandbox',
+    '--disable-gpu',
+    '--disable-software-rasterizer',
+    '--disable-extensions',
+]
+
+
+class _BrowserSlot:
+    """A long-lived browser plus the bookkeeping used to decide when to recycle it"""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.pages_served = 0
+        self.active = 0
+        self.retiring = False
+
+    @property
+    def healthy(self) -> bool:
+        return not self.retiring and self.browser.is_connected()
+
+
+class BrowserPool:
+    """
+    Hands out isolated BrowserContexts over a small set of long-lived browsers.
+
+    - At most `max_contexts` contexts are open at once; extra callers queue in
+      the admission controller (and may be rejected with `Overloaded`)
+    - A browser is recycled after `max_pages` contexts, or when the Chromium
+      process tree grows beyond `max_rss_mb`
+    - Crashed/disconnected browsers are replaced on the next request
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        max_contexts: int = 3,
+        max_pages: int = 50,
+        max_rss_mb: int = 700,
+        headless: bool = True,
+        admission: Optional[AdmissionController] = None,
+    ):
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.headless = headless
+
+        self._playwright = None
+        self._slots: List[_BrowserSlot] = []
+        self.admission = admission or AdmissionController(max_contexts, max_queue=1 << 30, max_wait=None)
+        self._lock = asyncio.Lock()
+        self._started = False
+        self.recycled = 0
+
+    async def start(self):
+        """Start Playwright and pre-launch the browsers"""
+        async with self._lock:
+            if not self._started:
+                await self._start_playwright()
+            while len(self._slots) < self.size:
+                self._slots.append(await self._launch())
+        logger.info("Browser pool started (%d browser(s), %d context slot(s))", self.size, self.admission.limit)
+
+    async def stop(self):
+        """Close every browser and stop Playwright"""
+        async with self._lock:
+            slots, self._slots = self._slots, []
+        for slot in slots:
+            await self._close_browser(slot)
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+        self._started = False
+
+    @asynccontextmanager
+    async def context(self, **options):
+        """
+        Yield a fresh BrowserContext; it is closed (and the browser possibly
+        recycled) when the block exits.
+        """
+        async with self.admission.slot():
+            slot = await self._acquire_slot()
+            slot.active += 1
+            context = None
+            try:
+                context = await slot.browser.new_context(**options)
+                yield context
+            finally:
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception as e:
+                        logger.warning("Error closing context: %s", e)
+                slot.active -= 1
+                slot.pages_served += 1
+                await self._maybe_recycle(slot)
+
+    def stats(self) -> Dict[str, int]:
+        """Pool state for the health endpoint"""
+        return {
+            "browsers": len(self._slots),
+            "active_contexts": sum(slot.active for slot in self._slots),
+            "max_contexts": self.admission.limit,
+            "waiting": self.admission.waiting,
+            "pages_served": sum(slot.pages_served for slot in self._slots),
+            "recycled": self.recycled,
+        }
+
+    async def _launch(self) -> _BrowserSlot:
+        with metrics.stage("browser_launch"):
+            browser = await self._playwright.chromium.launch(
+                headless=self.headless,
+                args=CHROMIUM_ARGS,
+            )
+        return _BrowserSlot(browser)
+
+    async def _acquire_slot(self) -> _BrowserSlot:
+        """Pick the least busy healthy browser, launching replacements as needed"""
+        async with self._lock:
+            if not self._started:
+                await self._start_playwright()
+
+            for slot in [s for s in self._slots if not s.browser.is_connected()]:
+                logger.warning("Browser disconnected, replacing it")
+                self._slots.remove(slot)
+
+            healthy = [slot for slot in self._slots if slot.healthy]
+            while len(healthy) < self.size:
+                slot = await self._launch()
+                self._slots.append(slot)
+                healthy.append(slot)
+
+            return min(healthy, key=lambda s: s.active)
+
+    async def _start_playwright(self):
+        if async_playwright is None:
+            raise RuntimeError("Playwright not installed on server")
+        self._playwright = await async_playwright().start()
+        self._started = True
+
+    async def _maybe_recycle(self, slot: _BrowserSlot):
+        """Retire a browser that served too many pages or uses too much memory"""
+        if not slot.retiring:
+            if self.max_pages and slot.pages_served >= self.max_pages:
+                logger.info("Recycling browser after %d pages", slot.pages_served)
+                slot.retiring = True
+            elif self.max_rss_mb:
+                rss_mb = await asyncio.to_thread(_browser_tree_rss_mb)
+                if rss_mb > self.max_rss_mb:
+                    logger.info("Recycling browser, Chromium RSS %.0f MB > %d MB", rss_mb, self.max_rss_mb)
+                    slot.retiring = True
+
+        if slot.retiring and slot.active == 0:
+            async with self._lock:
+                if slot in self._slots:
+                    self._slots.remove(slot)
+                    self.recycled += 1
+            await self._close_browser(slot)
+
+    async def _close_browser(self, slot: _BrowserSlot):
+        try:
+            if slot.browser.is_connected():
+                await slot.browser.close()
+        except Exception as e:
+            logger.warning("Error closing browser: %s", e)
+
+
+def _is_playwright_driver(pid: int) -> bool:
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as f:
+            return b'run-driver' in f.read().split(b'\0')
+    except OSError:
+        return False
+
+
+def _browser_tree_rss_mb() -> float:
+    """
+    Resident memory (MB) of the Playwright driver and its Chromium processes.
+    Other children of the server (parse pool workers, the multiprocessing
+    resource tracker) are not counted. Linux only; 0 elsewhere.
+    """
+    try:
+        children: Dict[int, List[int]] = {}
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    # comm may contain spaces, so split after the closing paren
+                    fields = f.read().rsplit(')', 1)[1].split()
+                children.setdefault(int(fields[1]), []).append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    except OSError:
+        return 0.0
+
+    # Start from the driver (`node cli.js run-driver`) rather than this process
+    descendants = [pid for pid in children.get(os.getpid(), []) if _is_playwright_driver(pid)]
+    frontier = list(descendants)
+    while frontier:
+        pid = frontier.pop()
+        descendants.extend(children.get(pid, []))
+        frontier.extend(children.get(pid, []))
+
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    for pid in descendants:
+        try:
+            with open(f'/proc/{pid}/statm') as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+    return total / (1024 * 1024)
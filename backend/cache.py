@@ -0,0 +1,162 @@
+"""
+Result cache for scraped carts
+
+Entries are keyed by the cart's share ID rather than the raw URL, so the same
+cart shared through different links (tracking params, country paths, retries
+from the app) hits the same entry. Memory is an LRU with a TTL; an optional
+SQLite file keeps results across restarts.
+"""
+
+import asyncio
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+
+# Query params that never change which cart a URL points to
+_IGNORED_PARAMS = {'url_from', 'cart_share', 'local_country', 'localcountry', 'tr_ssrc'}
+
+
+def cart_key(url: str) -> str:
+    """
+    Normalize a cart URL to a cache key.
+
+    - cart landing URLs   -> "group:<group_id>"
+    - sharejump links     -> "link:<link token>"
+    - anything else       -> host + path + sorted, meaningful query params
+    """
+    parsed = urlparse(url.strip())
+    params = parse_qs(parsed.query)
+
+    group_id = params.get('group_id', [''])[0].strip()
+    if group_id:
+        return f"group:{group_id}"
+
+    link = params.get('link', [''])[0].strip()
+    if link:
+        return f"link:{link}"
+
+    query = sorted(
+        (k, v) for k, values in params.items()
+        if k not in _IGNORED_PARAMS and not k.startswith('utm_')
+        for v in values
+    )
+    host = parsed.netloc.lower()
+    path = parsed.path.rstrip('/')
+    return f"url:{host}{path}?{urlencode(query)}" if query else f"url:{host}{path}"
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    stored_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+
+class ResultCache:
+    """
+    TTL + LRU cache of JSON-serializable scrape results.
+
+    `sqlite_path` enables the on-disk tier: misses in memory fall back to it
+    and hits are promoted back into memory.
+    """
+
+    def __init__(self, ttl: float = 600, max_entries: int = 256, sqlite_path: Optional[str] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.sqlite_path = sqlite_path
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            self._db_lock = asyncio.Lock()
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        if self.ttl <= 0:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.age < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            del self._entries[key]
+
+        if self._db is not None:
+            entry = await self._db_call(self._db_get, key)
+            if entry is not None:
+                self._remember(key, entry)
+                self.hits += 1
+                return entry
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any):
+        if self.ttl <= 0:
+            return
+        entry = CacheEntry(value=value, stored_at=time.time())
+        self._remember(key, entry)
+        if self._db is not None:
+            await self._db_call(self._db_set, key, entry)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "ttl": self.ttl,
+            "sqlite": bool(self._db),
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _remember(self, key: str, entry: CacheEntry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _db_call(self, fn, *args):
+        # sqlite3 blocks; keep it off the event loop and one call at a time
+        async with self._db_lock:
+            return await asyncio.to_thread(fn, *args)
+
+    def _db_get(self, key: str) -> Optional[CacheEntry]:
+        row = self._db.execute(
+            "SELECT value, stored_at FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if time.time() - row[1] >= self.ttl:
+            self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+            self._db.commit()
+            return None
+        return CacheEntry(value=json.loads(row[0]), stored_at=row[1])
+
+    def _db_set(self, key: str, entry: CacheEntry):
+        self._db.execute(
+            "INSERT OR REPLACE INTO results (key, value, stored_at) VALUES (?, ?, ?)",
+            (key, json.dumps(entry.value), entry.stored_at),
+        )
+        self._db.execute("DELETE FROM results WHERE stored_at < ?", (time.time() - self.ttl,))
+        self._db.commit()
@@ -0,0 +1,79 @@
+"""
+Network capture of Shein's cart API responses
+
+The shared-cart page fetches its contents from a JSON endpoint. Listening to
+those responses gives us the whole cart in one payload, instead of reading
+globals or walking the DOM element by element over CDP.
+"""
+
+import asyncio
+import logging
+import re
+from typing import Awaitable, Callable, List, Optional
+
+from readiness import CART_API_PATTERN
+
+
+logger = logging.getLogger(__name__)
+
+
+class CartResponseCapture:
+    """
+    Collects cart items from JSON responses of a page.
+
+    Attach it *before* `page.goto`. `parse` turns a raw response body into a
+    list of items (async, so decoding can happen off the event loop); the
+    first payload that yields items wins and sets `ready`, so callers can
+    stop waiting as soon as it arrives.
+    """
+
+    def __init__(
+        self,
+        page,
+        parse: Callable[[bytes], Awaitable[List]],
+        api_pattern: re.Pattern = CART_API_PATTERN,
+    ):
+        self.parse = parse
+        self.api_pattern = api_pattern
+        self.items: List = []
+        self.source_url: Optional[str] = None
+        self.payloads_seen = 0
+        self.ready = asyncio.Event()
+        self._tasks = set()
+        page.on("response", self._on_response)
+
+    def _on_response(self, response):
+        if self.ready.is_set():
+            return
+        if response.request.resource_type not in ('xhr', 'fetch'):
+            return
+        if not self.api_pattern.search(response.url):
+            return
+        content_type = response.headers.get('content-type', '')
+        if 'json' not in content_type:
+            return
+
+        # Body reads are async; keep a reference so the task is not collected
+        task = asyncio.ensure_future(self._read(response))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _read(self, response):
+        try:
+            items = await self.parse(await response.body())
+        except Exception as e:
+            logger.warning("Could not decode cart API response %s: %s", response.url, e)
+            return
+
+        self.payloads_seen += 1
+        if self.ready.is_set():
+            return
+
+        if items:
+            self.items = items
+            self.source_url = response.url
+            self.ready.set()
+
+    def close(self):
+        for task in list(self._tasks):
+            task.cancel()
@@ -0,0 +1,246 @@
+"""
+Bounded search for the cart item list inside Shein's page state
+
+window.__NUXT__ and friends can be megabytes of nested objects, and the cart
+list sits at one of a handful of known places in them. Instead of recursing
+into every dict and list, we:
+
+1. try the known paths first (CART_JSON_PATHS),
+2. fall back to a breadth-first walk limited by depth and node count, and
+3. in the browser, run the same search inside the page (CART_CANDIDATES_JS)
+   so only the candidate arrays, trimmed to the fields we read, cross CDP
+   instead of the whole global.
+"""
+
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Keys whose list value may be the cart
+CART_LIST_KEYS = ('cart', 'cartItems', 'items', 'goods', 'goodsList')
+
+# Best guesses at where the list sits in the cart API response, the embedded
+# state and __NUXT__; none is confirmed against a live Shein page, which is
+# why the bounded walk stays as the fallback. The empty path means the payload
+# itself is the list (cart_items.json).
+DEFAULT_CART_PATHS = (
+    'info.goodsList',
+    'info.carts',
+    'cart.goodsList',
+    'cartInfo.carts',
+    'state.cart.info.goodsList',
+    'state.cart.goodsList',
+    '',
+)
+
+MAX_DEPTH = 8
+MAX_NODES = 20000
+
+Path = Tuple[str, ...]
+
+
+def parse_paths(spec) -> List[Path]:
+    """'a.b,c.d' (or a sequence of dotted strings) -> [('a', 'b'), ('c', 'd')]"""
+    if isinstance(spec, str):
+        spec = spec.split(',')
+    paths = []
+    for path in spec:
+        path = path.strip()
+        paths.append(tuple(path.split('.')) if path else ())
+    return paths
+
+
+def _resolve(data: Any, path: Path) -> Any:
+    for key in path:
+        if isinstance(data, dict):
+            data = data.get(key)
+        elif isinstance(data, list) and key.isdigit() and int(key) < len(data):
+            data = data[int(key)]
+        else:
+            return None
+    return data
+
+
+def find_cart_items(
+    data: Any,
+    parse_list: Callable[[list], List],
+    keys: Sequence[str] = CART_LIST_KEYS,
+    paths: Sequence[Path] = (),
+    max_depth: int = MAX_DEPTH,
+    max_nodes: int = MAX_NODES,
+) -> List:
+    """
+    First non-empty `parse_list(candidate)` for the lists in `data`
+
+    Known `paths` are tried first. Then a breadth-first walk visits at most
+    `max_nodes` containers, no deeper than `max_depth`. At each dict the
+    lists under `keys` are tried. A list reached during the walk is tried as
+    a whole, the way the old recursive parsers did.
+    """
+    for path in paths:
+        candidate = _resolve(data, path)
+        if isinstance(candidate, list):
+            items = parse_list(candidate)
+            if items:
+                return items
+
+    queue = deque([(data, 0)])
+    visited = 0
+    while queue and visited < max_nodes:
+        node, depth = queue.popleft()
+        visited += 1
+
+        if isinstance(node, list):
+            items = parse_list(node)
+            if items:
+                return items
+            continue
+        if not isinstance(node, dict):
+            continue
+
+        for key in keys:
+            value = node.get(key)
+            if isinstance(value, list):
+                items = parse_list(value)
+                if items:
+                    return items
+
+        if depth < max_depth:
+            for value in node.values():
+                if isinstance(value, (dict, list)):
+                    queue.append((value, depth + 1))
+
+    return []
+
+
+def has_named_item(values: list, name_fields: Sequence[str]) -> bool:
+    """
+    Whether a list may be the cart: some item in it has a name-like field
+
+    Every search applies this one rule to candidate lists (trim_candidates,
+    `looksLikeItems` in CART_CANDIDATES_JS, parse_cart_data in the backend);
+    the items of a list that passes are then kept if they have any known
+    field.
+    """
+    return any(isinstance(item, dict) and any(item.get(field) for field in name_fields) for item in values)
+
+
+def _trim(item: dict, fields: Sequence[str], objects: Dict[str, Sequence[str]]) -> dict:
+    kept = {}
+    for field in fields:
+        if field not in item:
+            continue
+        value = item[field]
+        if not isinstance(value, (dict, list)):
+            kept[field] = value
+        elif field in objects and isinstance(value, dict):
+            kept[field] = {
+                key: value[key] for key in objects[field]
+                if key in value and not isinstance(value[key], (dict, list))
+            }
+    return kept
+
+
+def trim_candidates(
+    values: list,
+    name_fields: Sequence[str],
+    fields: Optional[Sequence[str]] = None,
+    objects: Optional[Dict[str, Sequence[str]]] = None,
+) -> list:
+    """
+    The dicts of `values` if any has a name-like field, else []
+
+    Items are trimmed to the scalar `fields` (None keeps them whole); a
+    field in `objects` may also be a dict, trimmed to the listed keys
+    (e.g. salePrice -> amountWithSymbol, amount). This is the filter
+    CART_CANDIDATES_JS applies in the page, for searches that run away from
+    the parser (e.g. in a worker process).
+    """
+    if not has_named_item(values, name_fields):
+        return []
+    items = [item for item in values if isinstance(item, dict)]
+    if fields is None:
+        return items
+    return [_trim(item, fields, objects or {}) for item in items]
+
+
+# Runs the same bounded search inside the page. Arguments: globals as
+# [source, name] pairs in priority order, list keys, known paths, the item
+# fields to keep (null keeps whole items), {field: keys} for fields that may
+# be objects, the name-like fields that mark an item, and the depth/node
+# budgets. Returns {source, path, items} or null.
+CART_CANDIDATES_JS = '''([globals, keys, paths, fields, objects, nameFields, maxDepth, maxNodes]) => {
+    // has_named_item
+    const looksLikeItems = (value) => Array.isArray(value) && value.some(
+        (item) => item && typeof item === 'object' && nameFields.some((field) => item[field])
+    );
+    const trim = (list) => list.filter((item) => item && typeof item === 'object').map((item) => {
+        if (!fields) return item;
+        const kept = {};
+        for (const field of fields) {
+            const value = item[field];
+            if (value !== undefined && (value === null || typeof value !== 'object')) {
+                kept[field] = value;
+            } else if (value && objects[field] && !Array.isArray(value)) {
+                const part = {};
+                for (const key of objects[field]) {
+                    if (value[key] !== undefined && (value[key] === null || typeof value[key] !== 'object')) part[key] = value[key];
+                }
+                kept[field] = part;
+            }
+        }
+        return kept;
+    });
+
+    for (const [source, name] of globals) {
+        const root = window[name];
+        if (!root || typeof root !== 'object') continue;
+
+        for (const path of paths) {
+            let node = root;
+            for (const key of path) node = node == null ? undefined : node[key];
+            if (looksLikeItems(node)) return { source, path: path.join('.'), items: trim(node) };
+        }
+
+        const queue = [[root, 0, '']];
+        for (let head = 0; head < queue.length && head < maxNodes; head++) {
+            const [node, depth, path] = queue[head];
+            if (Array.isArray(node)) {
+                if (looksLikeItems(node)) return { source, path, items: trim(node) };
+                continue;
+            }
+            for (const key of keys) {
+                if (looksLikeItems(node[key])) return { source, path: path ? path + '.' + key : key, items: trim(node[key]) };
+            }
+            if (depth >= maxDepth) continue;
+            for (const key of Object.keys(node)) {
+                const value = node[key];
+                if (value && typeof value === 'object') queue.push([value, depth + 1, path ? path + '.' + key : key]);
+            }
+        }
+    }
+    return null;
+}'''
+
+
+async def fetch_cart_candidates(
+    page,
+    globals_: Sequence[Tuple[str, str]],
+    name_fields: Sequence[str],
+    fields: Optional[Sequence[str]] = None,
+    objects: Optional[Dict[str, Sequence[str]]] = None,
+    keys: Sequence[str] = CART_LIST_KEYS,
+    paths: Sequence[Path] = (),
+    max_depth: int = MAX_DEPTH,
+    max_nodes: int = MAX_NODES,
+) -> Optional[Dict[str, Any]]:
+    """Candidate cart list from the page's globals, searched in the page"""
+    return await page.evaluate(CART_CANDIDATES_JS, [
+        [list(pair) for pair in globals_],
+        list(keys),
+        [list(path) for path in paths],
+        list(fields) if fields is not None else None,
+        {field: list(keys_) for field, keys_ in (objects or {}).items()},
+        list(name_fields),
+        max_depth,
+        max_nodes,
+    ])
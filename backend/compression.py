@@ -0,0 +1,146 @@
+"""
+Response compression (brotli when available, otherwise gzip)
+
+Cart responses are mostly repeated keys and image URLs, so they shrink a lot,
+which matters for phones on slow networks. Brotli needs the optional
+`brotli` package; without it clients asking for `br` get gzip.
+
+Streamed responses are flushed after every chunk so clients receive each
+part as soon as it is produced rather than when the compressor's buffer
+fills up.
+"""
+
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """'br' or 'gzip' from an Accept-Encoding header, or None"""
+    accepted = set()
+    for part in accept_encoding.lower().split(','):
+        coding, _, params = part.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(coding.strip())
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=brotli_quality)
+            self.compress = compressor.process
+            self.flush = compressor.flush
+            self.finish = compressor.finish
+        else:
+            compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # 31: gzip container
+            self.compress = compressor.compress
+            self.flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+            self.finish = compressor.flush
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1000, gzip_level: int = 6, brotli_quality: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+            if encoding:
+                responder = _CompressionResponder(self.app, encoding, self)
+                await responder(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+class _CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str, settings: CompressionMiddleware):
+        self.app = app
+        self.encoding = encoding
+        self.settings = settings
+        self.send: Optional[Send] = None
+        self.initial_message: Message = {}
+        self.started = False
+        self.passthrough = False
+        self.compressor: Optional[_Compressor] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    def _start_compressing(self) -> MutableHeaders:
+        self.compressor = _Compressor(self.encoding, self.settings.gzip_level, self.settings.brotli_quality)
+        headers = MutableHeaders(raw=self.initial_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        return headers
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Hold the start message until we know whether the body is compressed
+            self.initial_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = (
+                "content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            )
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.passthrough:
+            if not self.started:
+                self.started = True
+                await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        if not self.started:
+            self.started = True
+            if not more_body and len(body) < self.settings.minimum_size:
+                await self.send(self.initial_message)
+                await self.send(message)
+                self.passthrough = True
+                return
+
+            headers = self._start_compressing()
+            if more_body:
+                del headers["Content-Length"]
+                message["body"] = self.compressor.compress(body) + self.compressor.flush()
+            else:
+                message["body"] = self.compressor.compress(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(message["body"]))
+            await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        # Later chunks of a streamed response
+        if more_body:
+            message["body"] = self.compressor.compress(body) + self.compressor.flush()
+        else:
+            message["body"] = self.compressor.compress(body) + self.compressor.finish()
+        await self.send(message)
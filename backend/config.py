@@ -0,0 +1,148 @@
+"""
+Runtime configuration for the scraper backend
+Every value can be overridden with an environment variable (Railway / Fly secrets)
+"""
+
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        print(f"Invalid integer for {name}={value!r}, using {default}")
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        print(f"Invalid number for {name}={value!r}, using {default}")
+        return default
+
+
+def _env_str(name: str, default: str) -> str:
+    value = os.getenv(name)
+    return default if value is None else value.strip()
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_path(name: str, default: str) -> str:
+    """A file path; relative paths are taken from backend/, not the working directory"""
+    value = _env_str(name, default)
+    if not value:
+        return value
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), value)
+
+
+# Browser pool
+BROWSER_POOL_SIZE = _env_int("BROWSER_POOL_SIZE", 1)
+MAX_CONCURRENT_CONTEXTS = _env_int("MAX_CONCURRENT_CONTEXTS", 3)
+BROWSER_MAX_PAGES = _env_int("BROWSER_MAX_PAGES", 50)
+BROWSER_MAX_RSS_MB = _env_int("BROWSER_MAX_RSS_MB", 700)
+
+# Admission control: scrapes allowed to wait for a browser, and for how long
+ADMISSION_QUEUE_SIZE = _env_int("ADMISSION_QUEUE_SIZE", 10)
+ADMISSION_MAX_WAIT = _env_int("ADMISSION_MAX_WAIT", 20)
+
+# Seconds to wait for cart data after navigation before extracting anyway
+READINESS_TIMEOUT = _env_int("READINESS_TIMEOUT", 8)
+
+# Try a plain HTTP fetch + embedded JSON parse before launching a browser
+HTTP_FAST_PATH = _env_bool("HTTP_FAST_PATH", True)
+HTTP_TIMEOUT = _env_int("HTTP_TIMEOUT", 10)
+# Shared HTTP client: pooled keep-alive connections, HTTP/2 (needs `h2`)
+# and cached DNS lookups
+HTTP_MAX_CONNECTIONS = _env_int("HTTP_MAX_CONNECTIONS", 20)
+HTTP_MAX_KEEPALIVE = _env_int("HTTP_MAX_KEEPALIVE", 10)
+HTTP_KEEPALIVE_EXPIRY = _env_int("HTTP_KEEPALIVE_EXPIRY", 60)
+HTTP_MAX_PER_HOST = _env_int("HTTP_MAX_PER_HOST", 8)
+HTTP2 = _env_bool("HTTP2", True)
+DNS_CACHE_TTL = _env_int("DNS_CACHE_TTL", 300)
+# Script scanner for embedded state: auto, fast, selectolax, lxml, html.parser
+HTML_PARSER = _env_str("HTML_PARSER", "auto")
+
+# Worker processes parsing large pages / cart payloads off the event loop
+# (0 parses inline); smaller inputs are cheaper to parse inline
+PARSE_WORKERS = _env_int("PARSE_WORKERS", min(2, os.cpu_count() or 1))
+PARSE_OFFLOAD_MIN_BYTES = _env_int("PARSE_OFFLOAD_MIN_BYTES", 100_000)
+
+# Read the cart straight from Shein's cart API responses when possible
+NETWORK_CAPTURE = _env_bool("NETWORK_CAPTURE", True)
+
+# Request filtering in browser contexts: extra domains / URL regexes to block,
+# and strict mode (also abort resource types outside the allowlist)
+REQUEST_FILTER = _env_bool("REQUEST_FILTER", True)
+REQUEST_BLOCK_DOMAINS = _env_str("REQUEST_BLOCK_DOMAINS", "")
+REQUEST_BLOCK_PATTERNS = _env_str("REQUEST_BLOCK_PATTERNS", "")
+REQUEST_FILTER_STRICT = _env_bool("REQUEST_FILTER_STRICT", False)
+
+# Diagnostic captures (HTML + screenshot) of a sampled share of failed
+# scrapes, kept in a directory capped at DIAGNOSTICS_MAX_MB
+DIAGNOSTICS = _env_bool("DIAGNOSTICS", False)
+DIAGNOSTICS_DIR = _env_path("DIAGNOSTICS_DIR", "diagnostics")
+DIAGNOSTICS_SAMPLE_RATE = _env_float("DIAGNOSTICS_SAMPLE_RATE", 0.1)
+DIAGNOSTICS_MAX_MB = _env_int("DIAGNOSTICS_MAX_MB", 100)
+
+# Where to look for the cart list in page state (comma-separated dotted
+# paths, tried before a walk bounded by depth and visited nodes); empty uses
+# cart_search.DEFAULT_CART_PATHS
+CART_JSON_PATHS = _env_str("CART_JSON_PATHS", "")
+CART_SEARCH_MAX_DEPTH = _env_int("CART_SEARCH_MAX_DEPTH", 8)
+CART_SEARCH_MAX_NODES = _env_int("CART_SEARCH_MAX_NODES", 20000)
+
+# Prices: the currency of amounts shown without a symbol, the currencies cart
+# totals are given in, and the exchange rate file (re-read every RATES_REFRESH
+# seconds if it changed)
+PRICE_CURRENCY = _env_str("PRICE_CURRENCY", "ZAR")
+TOTAL_CURRENCIES = _env_str("TOTAL_CURRENCIES", "ZAR,USD,CDF")
+RATES_PATH = _env_path("RATES_PATH", "rates.json")
+RATES_REFRESH = _env_int("RATES_REFRESH", 3600)
+
+# Result cache (set CACHE_TTL=0 to disable, CACHE_SQLITE_PATH to persist)
+CACHE_TTL = _env_int("CACHE_TTL", 600)
+CACHE_MAX_ENTRIES = _env_int("CACHE_MAX_ENTRIES", 256)
+CACHE_SQLITE_PATH = _env_str("CACHE_SQLITE_PATH", "")
+
+# Where cart landing pages live; point at loadtest/replay_server.py for load tests
+SHEIN_BASE_URL = _env_str("SHEIN_BASE_URL", "https://m.shein.com")
+
+# Share link -> landing URL cache (persisted so restarts keep the mappings)
+RESOLVER_CACHE_TTL = _env_int("RESOLVER_CACHE_TTL", 7 * 24 * 3600)
+RESOLVER_CACHE_PATH = _env_path("RESOLVER_CACHE_PATH", "share_links.sqlite3")
+
+# Background scrape jobs
+JOB_WORKERS = _env_int("JOB_WORKERS", MAX_CONCURRENT_CONTEXTS)
+JOB_QUEUE_SIZE = _env_int("JOB_QUEUE_SIZE", 100)
+JOB_RESULT_TTL = _env_int("JOB_RESULT_TTL", 900)
+# Seconds a job keeps retrying while the browser pool is saturated
+JOB_MAX_WAIT = _env_int("JOB_MAX_WAIT", 300)
+
+# POST /scrape/batch: URLs per batch, scrapes of one batch at once, and the
+# seconds the whole batch may take
+BATCH_MAX_URLS = _env_int("BATCH_MAX_URLS", 50)
+BATCH_CONCURRENCY = _env_int("BATCH_CONCURRENCY", MAX_CONCURRENT_CONTEXTS)
+BATCH_DEADLINE = _env_int("BATCH_DEADLINE", 120)
+
+# Response compression: bodies smaller than this are sent as is
+COMPRESSION_MIN_SIZE = _env_int("COMPRESSION_MIN_SIZE", 1000)
+GZIP_LEVEL = _env_int("GZIP_LEVEL", 6)
+BROTLI_QUALITY = _env_int("BROTLI_QUALITY", 5)
+
+# Logging: level, "json" or "text", and the share of per-item debug lines kept
+LOG_LEVEL = _env_str("LOG_LEVEL", "INFO")
+LOG_FORMAT = _env_str("LOG_FORMAT", "json")
+LOG_SAMPLE_RATE = _env_float("LOG_SAMPLE_RATE", 0.05)
@@ -0,0 +1,145 @@
+"""
+Opt-in diagnostic captures of failed scrapes
+
+A capture is the page HTML, a screenshot and a small meta.json, written to
+its own directory (`<timestamp>-<label>-<id>`) so concurrent scrapes never
+overwrite each other. Only failures are captured, and only a sampled share
+of them (`sample_rate`), because taking a screenshot slows the scrape that
+is already failing.
+
+Only grabbing the HTML and screenshot happens while the page is open. The
+files are written in a worker thread after the scrape has moved on. After
+every write the oldest captures are deleted until the store is back under
+`max_bytes`.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import shutil
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_CHARS_RE = re.compile(r'[^A-Za-z0-9_-]+')
+
+
+class DiagnosticsStore:
+    """Size-capped directory of failure captures"""
+
+    def __init__(
+        self,
+        directory: str = 'diagnostics',
+        enabled: bool = False,
+        sample_rate: float = 1.0,
+        max_bytes: int = 100 * 1024 * 1024,
+    ):
+        self.directory = directory
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self._pending: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+        self.captured = 0
+        self.skipped = 0
+        self.failed = 0
+        self.rotated = 0
+
+    def should_capture(self) -> bool:
+        if not self.enabled:
+            return False
+        if random.random() < self.sample_rate:
+            return True
+        self.skipped += 1
+        return False
+
+    async def capture(self, page, label: str, reason: str, **meta) -> Optional[str]:
+        """
+        Snapshot a failed page if this failure is sampled
+
+        Returns the capture directory; its files are written in the
+        background (await `drain()` before exiting a script).
+        """
+        if not self.should_capture():
+            return None
+
+        files: Dict[str, bytes] = {}
+        try:
+            files['page.html'] = (await page.content()).encode('utf-8')
+        except Exception as e:
+            meta['html_error'] = str(e)
+        try:
+            files['screenshot.jpg'] = await page.screenshot(type='jpeg', quality=60)
+        except Exception as e:
+            meta['screenshot_error'] = str(e)
+
+        name = '-'.join((
+            time.strftime('%Y%m%dT%H%M%S'),
+            _UNSAFE_CHARS_RE.sub('_', label)[:40] or 'scrape',
+            uuid.uuid4().hex[:8],
+        ))
+        path = os.path.join(self.directory, name)
+        meta.update({'reason': reason, 'url': getattr(page, 'url', None), 'captured_at': time.time()})
+        files['meta.json'] = json.dumps(meta, default=str, indent=2).encode('utf-8')
+
+        task = asyncio.create_task(asyncio.to_thread(self._write, path, files))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        return path
+
+    async def drain(self):
+        """Wait for captures that are still being written"""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    def _write(self, path: str, files: Dict[str, bytes]):
+        try:
+            os.makedirs(path, exist_ok=True)
+            for filename, data in files.items():
+                with open(os.path.join(path, filename), 'wb') as f:
+                    f.write(data)
+            self.captured += 1
+            logger.info("Saved diagnostic capture to %s", path)
+        except OSError as e:
+            self.failed += 1
+            logger.warning("Could not write diagnostic capture %s: %s", path, e)
+            return
+        with self._lock:
+            self._rotate()
+
+    def _rotate(self):
+        """Delete the oldest captures until the store fits in max_bytes"""
+        captures = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.is_dir():
+                continue
+            try:
+                size = sum(file.stat().st_size for file in os.scandir(entry.path))
+                captures.append((entry.stat().st_mtime, entry.path, size))
+            except OSError:
+                continue
+            total += size
+
+        for _, path, size in sorted(captures):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            self.rotated += 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "captured": self.captured,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "rotated": self.rotated,
+            "pending": len(self._pending),
+        }
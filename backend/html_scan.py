@@ -0,0 +1,220 @@
+"""
+Script-only scanning of Shein pages
+
+The cart state Shein embeds (window.__INITIAL_STATE__, gbRawData, cartData,
+shareInfo, JSON script tags) always lives inside <script> tags, so there is
+no need to build a full document tree or run one regex per variable over the
+whole page. This module pulls out just the script contents and finds every
+known state assignment with a single precompiled scanner.
+
+Each assigned value is cut out with a brace-balanced, string-aware scan, so
+the slice is exactly the object (a lazy `{.+?};` regex stops at the first
+`};` inside it), and only those slices are decoded, with orjson when it is
+installed.
+
+Script extraction is pluggable:
+
+- fast:        plain string scanning, no dependencies (default)
+- selectolax:  lexbor/modest HTML parser, if installed
+- lxml:        lxml.html, if installed
+- html.parser: BeautifulSoup with the stdlib parser (the old behaviour)
+
+`auto` picks `fast`. Set HTML_PARSER to choose another one.
+"""
+
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, Iterator, List, Optional, Pattern, Sequence, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from selectolax.parser import HTMLParser as _SelectolaxParser
+except ImportError:
+    _SelectolaxParser = None
+
+try:
+    import lxml.html as _lxml_html
+except ImportError:
+    _lxml_html = None
+
+
+logger = logging.getLogger(__name__)
+
+PARSERS = ('fast', 'selectolax', 'lxml', 'html.parser')
+
+# Assignments we look for, in the order they are tried
+STATE_NAMES = ('__INITIAL_STATE__', 'gbRawData', 'cartData', 'shareInfo')
+
+_SCRIPT_OPEN_RE = re.compile(r'<script\b([^>]*)>', re.IGNORECASE)
+_SCRIPT_CLOSE_RE = re.compile(r'</script\s*>', re.IGNORECASE)
+_TYPE_ATTR_RE = re.compile(r'''\btype\s*=\s*["']?([^"'\s>]+)''', re.IGNORECASE)
+
+# One pass finds all of them: window.__X__ = {...}, var cartData = {...}, ...
+# The pattern starts with the bare names (a leading `window\.` or `\b` makes
+# re several times slower); the prefix is checked on the few hits instead.
+_STATE_ASSIGNMENT_RE = re.compile(r'(__INITIAL_STATE__|__NUXT__|gbRawData|cartData|shareInfo)\s*=\s*(?={)')
+_WINDOW_GLOBALS = {'__INITIAL_STATE__', '__NUXT__', 'gbRawData'}
+
+# Brackets plus whole string literals, so brackets inside strings are skipped
+_BRACKET_TOKEN_RE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|\'[^\'\\]*(?:\\.[^\'\\]*)*\'|[{}\[\]]')
+_OPENERS = {'{': '}', '[': ']'}
+
+
+def available_parsers() -> List[str]:
+    """Parsers that can be used in this environment"""
+    parsers = ['fast']
+    if _SelectolaxParser is not None:
+        parsers.append('selectolax')
+    if _lxml_html is not None:
+        parsers.append('lxml')
+    try:
+        import bs4  # noqa: F401
+        parsers.append('html.parser')
+    except ImportError:
+        pass
+    return parsers
+
+
+def resolve_parser(parser: Optional[str] = None) -> str:
+    """Turn 'auto'/None (or HTML_PARSER) into an installed parser name"""
+    parser = (parser or os.getenv('HTML_PARSER', 'auto')).lower()
+    if parser == 'auto':
+        return 'fast'
+    if parser not in PARSERS:
+        raise ValueError(f"Unknown HTML parser {parser!r}, expected one of {', '.join(PARSERS)}")
+    if parser not in available_parsers():
+        logger.warning("HTML parser %r is not installed, using 'fast'", parser)
+        return 'fast'
+    return parser
+
+
+def _scripts_fast(html: str) -> Iterator[Tuple[str, str]]:
+    pos = 0
+    while True:
+        opening = _SCRIPT_OPEN_RE.search(html, pos)
+        if not opening:
+            return
+        closing = _SCRIPT_CLOSE_RE.search(html, opening.end())
+        if not closing:
+            return
+        type_attr = _TYPE_ATTR_RE.search(opening.group(1))
+        yield (type_attr.group(1).lower() if type_attr else ''), html[opening.end():closing.start()]
+        pos = closing.end()
+
+
+def _scripts_selectolax(html: str) -> Iterator[Tuple[str, str]]:
+    for node in _SelectolaxParser(html).css('script'):
+        yield (node.attributes.get('type') or '').lower(), node.text(deep=False)
+
+
+def _scripts_lxml(html: str) -> Iterator[Tuple[str, str]]:
+    if not html.strip():
+        return
+    for element in _lxml_html.fromstring(html).iter('script'):
+        yield (element.get('type') or '').lower(), element.text or ''
+
+
+def _scripts_html_parser(html: str) -> Iterator[Tuple[str, str]]:
+    from bs4 import BeautifulSoup
+    for script in BeautifulSoup(html, 'html.parser').find_all('script'):
+        yield (script.get('type') or '').lower(), script.string or ''
+
+
+_SCRIPT_SCANNERS = {
+    'fast': _scripts_fast,
+    'selectolax': _scripts_selectolax,
+    'lxml': _scripts_lxml,
+    'html.parser': _scripts_html_parser,
+}
+
+
+def iter_scripts(html: str, parser: Optional[str] = None) -> Iterator[Tuple[str, str]]:
+    """Yield (type, content) for every <script> in the page"""
+    return _SCRIPT_SCANNERS[resolve_parser(parser)](html)
+
+
+def _is_assignment_target(content: str, start: int, name: str) -> bool:
+    if name in _WINDOW_GLOBALS:
+        return content.endswith('window.', 0, start)
+    # cartData / shareInfo: a whole identifier (var x, window.x, obj.x)
+    return start == 0 or not (content[start - 1].isalnum() or content[start - 1] in '_$')
+
+
+def loads(text: str) -> Any:
+    """json.loads, through orjson when available (raises json.JSONDecodeError either way)"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def json_span(text: str, start: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) of the object or array opening at text[start]
+
+    Leading whitespace is skipped. One linear pass that counts brackets
+    outside string literals; returns None if the value is not closed.
+    """
+    length = len(text)
+    while start < length and text[start].isspace():
+        start += 1
+    if start >= length or text[start] not in _OPENERS:
+        return None
+
+    depth = 0
+    for token in _BRACKET_TOKEN_RE.finditer(text, start):
+        char = text[token.start()]
+        if char in _OPENERS:
+            depth += 1
+        elif char in '}]':
+            depth -= 1
+            if depth == 0:
+                return start, token.end()
+    return None
+
+
+def extract_assigned(text: str, assignment: Pattern) -> Optional[str]:
+    """
+    Raw JSON assigned by the first match of `assignment`
+
+    The pattern must end just before the value, e.g.
+    re.compile(r'window\.__INITIAL_STATE__\s*=\s*').
+    """
+    for match in assignment.finditer(text):
+        span = json_span(text, match.end())
+        if span:
+            return text[span[0]:span[1]]
+    return None
+
+
+def find_embedded_state(html: str, parser: Optional[str] = None,
+                        names: Sequence[str] = STATE_NAMES) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """
+    Raw JSON texts embedded in the page's scripts
+
+    Returns (json_scripts, assignments): the contents of every
+    type="application/json" script, and (name, object text) for every known
+    state assignment, ordered by `names`. Nothing is decoded here; use
+    `loads` on the texts that are needed.
+    """
+    json_scripts = []
+    found: Dict[str, List[str]] = {}
+    for script_type, content in iter_scripts(html, parser):
+        if script_type == 'application/json':
+            json_scripts.append(content)
+            continue
+        for match in _STATE_ASSIGNMENT_RE.finditer(content):
+            name = match.group(1)
+            if name not in names or not _is_assignment_target(content, match.start(), name):
+                continue
+            span = json_span(content, match.end())
+            if span:
+                found.setdefault(name, []).append(content[span[0]:span[1]])
+
+    assignments = [(name, text) for name in names for text in found.get(name, [])]
+    return json_scripts, assignments
@@ -0,0 +1,215 @@
+"""
+Pooled HTTP client for everything that is not the browser
+
+Share resolution and cart landing fetches go to a handful of Shein hosts
+over and over. One long-lived client keeps their connections open, so only
+the first request to a host pays for DNS, TCP and TLS:
+
+- keep-alive pooling with a pool-wide connection cap, plus a cap on the
+  requests in flight to any one host so one slow host cannot take every
+  connection;
+- HTTP/2 when the `h2` package is installed (`pip install httpx[http2]`),
+  which multiplexes concurrent requests to a host over one connection;
+- a small DNS cache, so connections that are opened again (after the
+  keep-alive expiry, or for a second connection) skip the lookup.
+"""
+
+import asyncio
+import ipaddress
+import logging
+import socket
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpcore
+import httpx
+
+try:
+    import h2  # noqa: F401 (enables http2=True in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+logger = logging.getLogger(__name__)
+
+
+class CachingDNSBackend(httpcore.AsyncNetworkBackend):
+    """Network backend that resolves host names once per `ttl` seconds"""
+
+    def __init__(self, ttl: float = 300, backend: Optional[httpcore.AsyncNetworkBackend] = None):
+        self.ttl = ttl
+        self.backend = backend or httpcore.AnyIOBackend()
+        self._cache: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def _resolve(self, host: str, port: int, timeout: Optional[float]) -> List[str]:
+        key = (host, port)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        lookup = asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        try:
+            infos = await asyncio.wait_for(lookup, timeout)
+        except asyncio.TimeoutError:
+            raise httpcore.ConnectTimeout(f"DNS lookup of {host} timed out")
+        except OSError as e:
+            raise httpcore.ConnectError(str(e))
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self._cache[key] = (time.monotonic() + self.ttl, addresses)
+        return addresses
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        try:
+            ipaddress.ip_address(host)
+            return await self.backend.connect_tcp(host, port, timeout, local_address, socket_options)
+        except ValueError:
+            pass
+
+        # TLS still verifies the host name: httpcore passes it separately as SNI
+        error: Optional[Exception] = None
+        for address in await self._resolve(host, port, timeout):
+            try:
+                return await self.backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        # Every cached address failed; look the host up again next time
+        self._cache.pop((host, port), None)
+        raise error or httpcore.ConnectError(f"No addresses for {host}")
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self.backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self.backend.sleep(seconds)
+
+    def stats(self) -> dict:
+        return {"hosts": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+class _HostSlotStream(httpx.AsyncByteStream):
+    """Response body that gives its per-host slot back once it is closed"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, slots: asyncio.Semaphore):
+        self._stream = stream
+        self._slots: Optional[asyncio.Semaphore] = slots
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+                self._slots = None
+
+
+class PooledTransport(httpx.AsyncHTTPTransport):
+    """httpx transport with the caching DNS backend and a per-host request cap"""
+
+    def __init__(
+        self,
+        dns: CachingDNSBackend,
+        max_per_host: Optional[int] = None,
+        http2: bool = False,
+        limits: httpx.Limits = httpx.Limits(),
+        verify: bool = True,
+        retries: int = 0,
+    ):
+        super().__init__(http2=http2, limits=limits, verify=verify, retries=retries)
+        # The pool httpx would build, plus the network backend it has no option for
+        self.pool = self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(verify=verify),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=True,
+            http2=http2,
+            retries=retries,
+            network_backend=dns,
+        )
+        self.dns = dns
+        self.http2 = http2
+        self.max_per_host = max_per_host
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not self.max_per_host:
+            return await super().handle_async_request(request)
+        slots = self._host_slots.get(request.url.host)
+        if slots is None:
+            slots = self._host_slots[request.url.host] = asyncio.Semaphore(self.max_per_host)
+
+        # The slot is held until the body has been read (or the response closed)
+        await slots.acquire()
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            slots.release()
+            raise
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_HostSlotStream(response.stream, slots),
+            extensions=response.extensions,
+        )
+
+    def stats(self) -> dict:
+        connections = self.pool.connections
+        return {
+            "http2": self.http2,
+            "connections": len(connections),
+            "idle_connections": sum(1 for connection in connections if connection.is_idle()),
+            **{f"dns_{key}": value for key, value in self.dns.stats().items()},
+        }
+
+
+class PooledClient(httpx.AsyncClient):
+    """AsyncClient that keeps a handle on its PooledTransport for stats"""
+
+    def __init__(self, transport: PooledTransport, **kwargs):
+        super().__init__(transport=transport, **kwargs)
+        self.pooled_transport = transport
+
+
+def create_async_client(
+    headers: Optional[dict] = None,
+    timeout: float = 10,
+    max_connections: int = 20,
+    max_keepalive_connections: int = 10,
+    keepalive_expiry: float = 60,
+    max_per_host: Optional[int] = 8,
+    http2: bool = True,
+    dns_ttl: float = 300,
+    follow_redirects: bool = True,
+) -> PooledClient:
+    """An AsyncClient meant to live as long as the process (close it on exit)"""
+    http2 = http2 and HTTP2_AVAILABLE
+    transport = PooledTransport(
+        dns=CachingDNSBackend(ttl=dns_ttl),
+        max_per_host=max_per_host,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+    )
+    return PooledClient(
+        transport=transport,
+        headers=headers,
+        timeout=timeout,
+        follow_redirects=follow_redirects,
+    )
+
+
+def client_stats(client: httpx.AsyncClient) -> dict:
+    """Pool and DNS cache stats of a client made by create_async_client"""
+    return client.pooled_transport.stats() if isinstance(client, PooledClient) else {}
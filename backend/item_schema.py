@@ -0,0 +1,169 @@
+"""
+One alias table for cart item fields
+
+Shein names the same field differently depending on where the item comes
+from (`goods_name` in the cart API, `goodsName` in page state, `title` in
+older payloads). Every extractor used to carry its own key lists, and they
+drifted apart. FIELD_ALIASES is now the single table, in priority order,
+and ItemSchema compiles it once and normalizes whole item lists with it.
+
+The schema also counts which alias filled each field, so `stats()` shows
+which spellings Shein is actually sending.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# field -> aliases, most specific first
+FIELD_ALIASES: Dict[str, Tuple[str, ...]] = {
+    'name': ('name', 'title', 'productName', 'goodsName', 'goods_name', 'goods_title'),
+    'price': ('price', 'salePrice', 'retailPrice', 'unit_price', 'unitPrice', 'goods_price', 'amount'),
+    'quantity': ('quantity', 'qty', 'num', 'goods_num'),
+    'image': ('image', 'img', 'goodsImg', 'goods_img', 'goods_image', 'goodsThumb', 'thumbnail', 'pic'),
+    'sku': ('sku', 'id', 'productId', 'goodsId', 'goods_id', 'goods_sn', 'productRelationID'),
+    'color': ('color',),
+    'size': ('size',),
+    'attributes': ('attr', 'attributes', 'sku_info', 'skuInfo', 'attrInfo'),
+}
+
+# Fields whose value is a dict/list; every other field only takes scalars
+CONTAINER_FIELDS = ('attributes',)
+
+# Scalar fields Shein also sends as objects, and the keys read from those, e.g.
+# salePrice: {"amount": "148.00", "amountWithSymbol": "R148.00", "usdAmount": ...}
+OBJECT_FIELDS: Dict[str, Tuple[str, ...]] = {
+    'price': ('amountWithSymbol', 'amount'),
+}
+
+
+def object_value(value: dict, keys: Sequence[str]) -> Any:
+    """The first set scalar among `value[key]` for `keys`, or None"""
+    for key in keys:
+        found = value.get(key)
+        if found is not None and found != '' and not isinstance(found, (dict, list)):
+            return found
+    return None
+
+
+def absolute_image_url(src) -> str:
+    src = str(src)
+    return 'https:' + src if src.startswith('//') else src
+
+
+def price_text(value) -> Optional[str]:
+    """The price as shown; price objects give their `amountWithSymbol` (or `amount`)"""
+    if isinstance(value, dict):
+        value = object_value(value, OBJECT_FIELDS['price'])
+        if value is None:
+            return None
+    return str(value)
+
+
+# A converter returning None means the value is not usable
+CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    'name': str,
+    'price': price_text,
+    'sku': str,
+    'color': str,
+    'size': str,
+    'image': absolute_image_url,
+}
+
+
+class ItemSchema:
+    """
+    Normalizes raw item dicts into {field: value} with the alias table
+
+    A value counts when it is set and of the right kind (scalar, or a
+    non-empty dict/list for CONTAINER_FIELDS; OBJECT_FIELDS also take a dict
+    for their converter to read); 0 is a value, so a quantity or price of 0
+    is kept. Items without any known field are dropped, and so are items
+    missing one of the `required` fields (none by default).
+
+    >>> ItemSchema(fields=('name', 'price', 'quantity')).normalize({
+    ...     'goods_name': 'Mid-Length Dress', 'quantity': 2,
+    ...     'salePrice': {'amount': '148.00', 'amountWithSymbol': 'R148.00', 'usdAmount': '8.29'},
+    ...     'retailPrice': {'amount': '168.00', 'amountWithSymbol': 'R168.00'},
+    ... })
+    ({'name': 'Mid-Length Dress', 'price': 'R148.00', 'quantity': 2}, {'name': 'goods_name', 'price': 'salePrice', 'quantity': 'quantity'})
+    """
+
+    def __init__(
+        self,
+        aliases: Dict[str, Sequence[str]] = FIELD_ALIASES,
+        required: Sequence[str] = (),
+        fields: Optional[Iterable[str]] = None,
+        converters: Dict[str, Callable[[Any], Any]] = CONVERTERS,
+        containers: Sequence[str] = CONTAINER_FIELDS,
+        objects: Dict[str, Sequence[str]] = OBJECT_FIELDS,
+    ):
+        fields = list(aliases) if fields is None else list(fields)
+        self.aliases = {field: tuple(aliases[field]) for field in fields}
+        self.required = tuple(required)
+        self.objects = {field: tuple(objects[field]) for field in fields if field in objects}
+        # (field, aliases, converter, wants a container, takes an object), compiled once
+        self._plan = [
+            (field, self.aliases[field], converters.get(field), field in containers, field in self.objects)
+            for field in fields
+        ]
+        self._counts: Dict[Tuple[str, str], int] = {}
+
+    @property
+    def keys(self) -> List[str]:
+        """Every alias of the scalar fields (what in-page / worker searches keep)"""
+        return [alias for field, aliases, _, container, _ in self._plan if not container for alias in aliases]
+
+    @property
+    def object_keys(self) -> Dict[str, List[str]]:
+        """{alias: keys read from it} for aliases that may hold an object (what searches keep of those)"""
+        return {
+            alias: list(self.objects[field])
+            for field, aliases, *_ in self._plan if field in self.objects
+            for alias in aliases
+        }
+
+    def normalize(self, item: dict) -> Tuple[Optional[dict], Dict[str, str]]:
+        """(fields, {field: alias that matched}); fields is None if the item is dropped"""
+        data = {}
+        matched = {}
+        for field, aliases, convert, container, takes_object in self._plan:
+            for alias in aliases:
+                value = item.get(alias)
+                if value is None or value == '':
+                    continue
+                if isinstance(value, (dict, list)):
+                    if not (container and value) and not (takes_object and isinstance(value, dict)):
+                        continue
+                elif container:
+                    continue
+                if convert:
+                    value = convert(value)
+                    if value is None:
+                        continue
+                data[field] = value
+                matched[field] = alias
+                break
+        if not data:
+            return None, matched
+        for field in self.required:
+            if field not in data:
+                return None, matched
+        return data, matched
+
+    def normalize_list(self, values: Iterable) -> List[dict]:
+        """Normalized dicts of the items in `values` that are not dropped"""
+        items = []
+        counts = self._counts
+        for item in values:
+            if not isinstance(item, dict):
+                continue
+            data, matched = self.normalize(item)
+            if data is None:
+                continue
+            items.append(data)
+            for pair in matched.items():
+                counts[pair] = counts.get(pair, 0) + 1
+        return items
+
+    def stats(self) -> Dict[str, int]:
+        """How often each alias filled its field, e.g. {'name.goods_name': 12}"""
+        return {f"{field}.{alias}": count for (field, alias), count in sorted(self._counts.items())}
@@ -0,0 +1,128 @@
+"""
+Background scrape jobs
+
+`POST /scrape/jobs` enqueues a job and returns straight away; a fixed number
+of workers drain the queue in priority order (higher first, then arrival
+order) and clients poll `GET /scrape/jobs/{id}` for the result. Finished jobs
+are kept for `result_ttl` seconds.
+"""
+
+import asyncio
+import itertools
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class JobQueueFull(Exception):
+    """Raised when the job queue cannot take more work"""
+
+
+class JobFailed(Exception):
+    """Raised by `run` to mark a job "failed" with this message"""
+
+
+@dataclass
+class Job:
+    id: str
+    url: str
+    priority: int = 0
+    refresh: bool = False
+    status: str = "queued"  # queued | running | done | failed
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+
+
+class JobQueue:
+    def __init__(
+        self,
+        run: Callable[[Job], Awaitable[Any]],
+        workers: int = 3,
+        max_queued: int = 100,
+        result_ttl: float = 900,
+    ):
+        self.run = run
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self.jobs: Dict[str, Job] = {}
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._tasks = []
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, url: str, priority: int = 0, refresh: bool = False, result: Any = None) -> Job:
+        """
+        Queue a job. Passing `result` records an already finished job instead
+        (e.g. a cart served from cache) so it does not wait for a worker.
+        """
+        self._expire()
+        job = Job(id=uuid.uuid4().hex, url=url, priority=priority, refresh=refresh)
+        if result is not None:
+            job.status = "done"
+            job.result = result
+            job.started_at = job.finished_at = job.created_at
+            self.jobs[job.id] = job
+            return job
+
+        if self._queue.qsize() >= self.max_queued:
+            raise JobQueueFull(f"{self._queue.qsize()} jobs already queued")
+
+        self.jobs[job.id] = job
+        # PriorityQueue pops the smallest entry: negate priority, then FIFO
+        self._queue.put_nowait((-priority, next(self._sequence), job.id))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def stats(self) -> dict:
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        for job in self.jobs.values():
+            counts[job.status] += 1
+        return {"workers": self.workers, **counts}
+
+    async def _worker(self):
+        while True:
+            _, _, job_id = await self._queue.get()
+            job = self.jobs.get(job_id)
+            try:
+                if job is None or job.status != "queued":
+                    continue
+                job.status = "running"
+                job.started_at = time.time()
+                try:
+                    job.result = await self.run(job)
+                    job.status = "done"
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    job.status = "failed"
+                    job.error = str(e)
+                finally:
+                    job.finished_at = time.time()
+            finally:
+                self._queue.task_done()
+
+    def _expire(self):
+        cutoff = time.time() - self.result_ttl
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
@@ -0,0 +1,128 @@
+"""
+Structured, non-blocking logging
+
+Log calls only put the record on an in-memory queue; a background thread
+formats it and writes it to stdout. Request handlers therefore never block
+on stdout, and when the queue is full records are dropped rather than
+stalling the event loop.
+
+Every record carries the `request_id` of the request (or job) that produced
+it, so the lines of one scrape can be picked out of interleaved Railway logs.
+Chatty per-item lines are logged with `extra={"sample": True}` and only a
+fraction of them (LOG_SAMPLE_RATE) is kept.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional, TextIO
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id", "sample"}
+
+
+class ContextFilter(logging.Filter):
+    """Stamps records with the current request ID"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SampleFilter(logging.Filter):
+    """Keeps only `rate` of the records logged with extra={"sample": True}"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "sample", False):
+            return random.random() < self.rate
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra` fields are included as keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS:
+                entry[key] = value
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DroppingQueueHandler.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(
+    level: str = "INFO",
+    fmt: str = "json",
+    sample_rate: float = 0.05,
+    queue_size: int = 10000,
+    output: Optional[TextIO] = None,
+):
+    """Route the root logger through a background queue to `output` (stdout by default; idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(output or sys.stdout)
+    if fmt == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"))
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    handler = _DroppingQueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+    handler.addFilter(SampleFilter(sample_rate))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level.upper())
+    # httpx logs every request at INFO; the scrape lines already cover them
+    for name in ("httpx", "httpcore"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records (call on shutdown)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def stats() -> dict:
+    return {"dropped": _DroppingQueueHandler.dropped}
@@ -3,25 +3,237 @@ FastAPI Backend for Shein Cart Scraper
 Deployed on Railway
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, HttpUrl, field_validator, model_validator
 from typing import List, Dict, Optional
+from contextlib import asynccontextmanager
 import asyncio
+import logging
 import re
 import json
+import time
+import uuid
+
+import config
+import logs
+import metrics
+from admission import AdmissionController, Overloaded
+from browser_pool import BrowserPool
+from cache import ResultCache, cart_key
+from jobs import JobFailed, JobQueue, JobQueueFull
+from capture import CartResponseCapture
+from compression import CompressionMiddleware
+from diagnostics import DiagnosticsStore
+from http_client import client_stats, create_async_client
+from item_schema import ItemSchema
+from cart_search import DEFAULT_CART_PATHS, fetch_cart_candidates, find_cart_items, has_named_item, parse_paths
+from readiness import CartReadiness
+from request_filter import TRACKER_DOMAINS, TRACKER_PATTERNS, RequestFilter, parse_list
+from resolver import ShareResolver, is_share_url
+from singleflight import SingleFlight
+from parse_pool import CartSearch, ParseFailed, ParsePool, embedded_cart_candidates, payload_cart_candidates
+from pricing import RateTable, cart_totals, parse_price
+from tiers import EMBEDDED_STATE_NAMES, HEADERS, HttpTier, TierStats
 
 try:
     from playwright.async_api import async_playwright
 except ImportError:
     async_playwright = None
 
+try:
+    import orjson  # noqa: F401 (needed by ORJSONResponse)
+    from fastapi.responses import ORJSONResponse as ScrapeJSONResponse
+except ImportError:
+    ScrapeJSONResponse = JSONResponse
+
+
+logs.setup_logging(config.LOG_LEVEL, config.LOG_FORMAT, config.LOG_SAMPLE_RATE)
+logger = logging.getLogger(__name__)
+
+
+# Caps concurrent browser sessions; overflow waits briefly or gets a 429/503
+admission = AdmissionController(
+    limit=config.MAX_CONCURRENT_CONTEXTS,
+    max_queue=config.ADMISSION_QUEUE_SIZE,
+    max_wait=config.ADMISSION_MAX_WAIT,
+)
+
+browser_pool = BrowserPool(
+    size=config.BROWSER_POOL_SIZE,
+    max_pages=config.BROWSER_MAX_PAGES,
+    max_rss_mb=config.BROWSER_MAX_RSS_MB,
+    admission=admission,
+)
+
+result_cache = ResultCache(
+    ttl=config.CACHE_TTL,
+    max_entries=config.CACHE_MAX_ENTRIES,
+    sqlite_path=config.CACHE_SQLITE_PATH or None,
+)
+
+# Concurrent scrapes of the same cart share one browser session
+inflight_scrapes = SingleFlight()
+
+# Keep-alive (HTTP/2 if available) client shared by the share resolver and the HTTP tier
+http_client = create_async_client(
+    headers=HEADERS,
+    timeout=config.HTTP_TIMEOUT,
+    max_connections=config.HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=config.HTTP_MAX_KEEPALIVE,
+    keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+    max_per_host=config.HTTP_MAX_PER_HOST,
+    http2=config.HTTP2,
+    dns_ttl=config.DNS_CACHE_TTL,
+)
+
+# Share link -> cart landing URL; share links never change carts, so keep them long
+share_resolver = ShareResolver(
+    client=http_client,
+    cache=ResultCache(
+        ttl=config.RESOLVER_CACHE_TTL,
+        max_entries=4096,
+        sqlite_path=config.RESOLVER_CACHE_PATH or None,
+    ),
+    base_url=config.SHEIN_BASE_URL,
+)
+
+# Exchange rates for cart totals, re-read from RATES_PATH while running
+rate_table = RateTable(path=config.RATES_PATH or None, refresh=config.RATES_REFRESH)
+TOTAL_CURRENCIES = tuple(code.upper() for code in parse_list(config.TOTAL_CURRENCIES))
+
+# Sampled captures of failed scrapes (DIAGNOSTICS=true)
+diagnostics = DiagnosticsStore(
+    directory=config.DIAGNOSTICS_DIR,
+    enabled=config.DIAGNOSTICS,
+    sample_rate=config.DIAGNOSTICS_SAMPLE_RATE,
+    max_bytes=config.DIAGNOSTICS_MAX_MB * 1024 * 1024,
+)
+request_filter = RequestFilter(
+    domains=TRACKER_DOMAINS + tuple(parse_list(config.REQUEST_BLOCK_DOMAINS)),
+    patterns=TRACKER_PATTERNS + tuple(parse_list(config.REQUEST_BLOCK_PATTERNS)),
+    strict=config.REQUEST_FILTER_STRICT,
+    enabled=config.REQUEST_FILTER,
+)
+# Big pages and cart payloads are parsed in worker processes, off the event loop
+parse_pool = ParsePool(workers=config.PARSE_WORKERS, min_bytes=config.PARSE_OFFLOAD_MIN_BYTES)
+# Browser-free first tier; tier_stats shows how many scrapes skip Chromium
+http_tier = HttpTier(
+    client=http_client,
+    extract=lambda html: extract_page_items(html)
+)
+tier_stats = TierStats("http", "browser")
+
+# Background scrape jobs (POST /scrape/jobs)
+job_queue = JobQueue(
+    run=lambda job: run_scrape_job(job),
+    workers=config.JOB_WORKERS,
+    max_queued=config.JOB_QUEUE_SIZE,
+    result_ttl=config.JOB_RESULT_TTL,
+)
+
+
+# Component stats as Prometheus gauges
+metrics.register_stats({
+    "browser_pool": browser_pool.stats,
+    "admission": admission.stats,
+    "result_cache": result_cache.stats,
+    "inflight": inflight_scrapes.stats,
+    "jobs": job_queue.stats,
+    "request_filter": request_filter.stats,
+    "diagnostics": diagnostics.stats,
+    "parse_pool": parse_pool.stats,
+    "http_client": lambda: client_stats(http_client),
+    "exchange_rates": rate_table.stats,
+})
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up the browser and parse pools on startup and shut them down on exit"""
+    try:
+        await parse_pool.start()
+    except Exception as e:
+        # Parsing falls back to the event loop
+        logger.warning("Parse pool start failed: %s", e)
+    if async_playwright:
+        try:
+            await browser_pool.start()
+        except Exception as e:
+            # Keep serving; the pool retries the launch on the first scrape
+            logger.warning("Browser pool warm-up failed: %s", e)
+    job_queue.start()
+    rate_table.start()
+    yield
+    await rate_table.stop()
+    await job_queue.stop()
+    await diagnostics.drain()
+    await browser_pool.stop()
+    await parse_pool.stop()
+    await http_client.aclose()
+    result_cache.close()
+    share_resolver.cache.close()
+
+
 app = FastAPI(
     title="Shein Cart Scraper API",
     description="API to scrape Shein public cart URLs",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request, exc: Overloaded):
+    """Shed load quickly instead of queueing browser work without bound"""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+@app.middleware("http")
+async def request_id(request: Request, call_next):
+    """Tag every log line of a request with its ID (X-Request-ID, or a new one)"""
+    rid = request.headers.get("x-request-id") or uuid.uuid4().hex[:12]
+    token = logs.request_id_var.set(rid)
+    try:
+        response = await call_next(request)
+    finally:
+        logs.request_id_var.reset(token)
+    response.headers["X-Request-ID"] = rid
+    return response
+
+
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    """Per-stage Server-Timing header and latency histogram for scrape routes"""
+    if not request.url.path.startswith("/scrape"):
+        return await call_next(request)
+    
+    timings = metrics.start_request()
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+    
+    response.headers["Server-Timing"] = timings.header(total=elapsed)
+    # Label by route template; raw paths would let clients create unbounded series
+    route = request.scope.get("route")
+    metrics.observe_request(route.path if route else "unmatched", response.status_code, elapsed)
+    return response
+
+
+# Compress large carts for mobile clients (brotli if installed, else gzip)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=config.COMPRESSION_MIN_SIZE,
+    gzip_level=config.GZIP_LEVEL,
+    brotli_quality=config.BROTLI_QUALITY,
 )
 
+
 # CORS - allow all origins for now
 app.add_middleware(
     CORSMiddleware,
@@ -34,23 +246,108 @@ app.add_middleware(
 
 class ScrapeRequest(BaseModel):
     url: str
+    refresh: bool = False  # bypass the result cache
 
 
 class CartItem(BaseModel):
     name: Optional[str] = None
-    price: Optional[str] = None
-    quantity: Optional[str] = None
+    price: Optional[str] = None  # as shown on the page, e.g. "R148"
+    price_value: Optional[float] = None  # sale amount of `price`
+    original_price_value: Optional[float] = None  # struck-through amount, if `price` has one
+    currency: Optional[str] = None  # ISO 4217 code of both amounts, e.g. "ZAR"
+    quantity: Optional[int] = None
     image: Optional[str] = None
     sku: Optional[str] = None
     color: Optional[str] = None
     size: Optional[str] = None
 
+    @field_validator('quantity', mode='before')
+    @classmethod
+    def _parse_quantity(cls, value):
+        # Pages give "2", "x2" or "Qty: 2"
+        if isinstance(value, str):
+            match = re.search(r'\d+', value)
+            return int(match.group(0)) if match else None
+        return value
+
+    @model_validator(mode='after')
+    def _fill_price_value(self):
+        # "R148\nR168" -> 148.0 / 168.0 / "ZAR"; explicit values win
+        if self.price and (self.price_value is None or self.currency is None):
+            price = parse_price(self.price, config.PRICE_CURRENCY)
+            if price is not None:
+                if self.price_value is None:
+                    self.price_value = float(price.amount)
+                    if self.original_price_value is None and price.original is not None:
+                        self.original_price_value = float(price.original)
+                if self.currency is None:
+                    self.currency = price.currency
+        return self
+
+
+class CartTotals(BaseModel):
+    subtotal: Optional[Dict[str, float]] = None  # currency -> sum of sale price x quantity; None if no item is priced
+    original_subtotal: Optional[Dict[str, float]] = None  # the same at original prices
+    source_currencies: List[str]  # currencies the items are priced in
+    priced_items: int
+    unpriced_items: int  # items left out of the sums (no price or currency)
+    rates: Dict[str, float]  # units per 1 `rates_base`, for the total and item currencies
+    rates_base: str
+    rates_updated: Optional[str] = None
+
 
 class ScrapeResponse(BaseModel):
     success: bool
     items: List[CartItem]
     total_items: int
+    totals: Optional[CartTotals] = None  # filled in from `items`
     message: Optional[str] = None
+    cache_hit: bool = False
+    cache_age: Optional[float] = None  # seconds since the cached scrape
+
+    @model_validator(mode='after')
+    def _fill_totals(self):
+        if self.totals is None and self.items:
+            self.totals = CartTotals(**cart_totals(self.items, rate_table.current, TOTAL_CURRENCIES))
+        return self
+
+
+class ScrapeJobRequest(ScrapeRequest):
+    priority: int = 0  # higher runs first
+
+
+class BatchScrapeRequest(BaseModel):
+    urls: List[str]
+    refresh: bool = False
+    concurrency: Optional[int] = None  # scrapes of this batch at once (capped by BATCH_CONCURRENCY)
+    deadline: Optional[float] = None  # seconds for the whole batch (capped by BATCH_DEADLINE)
+
+    @field_validator('urls')
+    @classmethod
+    def _check_urls(cls, urls):
+        urls = [url.strip() for url in urls if url and url.strip()]
+        if not urls:
+            raise ValueError("at least one URL is required")
+        if len(urls) > config.BATCH_MAX_URLS:
+            raise ValueError(f"at most {config.BATCH_MAX_URLS} URLs per batch")
+        return urls
+
+
+class BatchScrapeResult(ScrapeResponse):
+    url: str
+    indexes: List[int]  # positions of this cart in the request's `urls`
+
+
+class ScrapeJob(BaseModel):
+    job_id: str
+    status: str
+    url: str
+    priority: int
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[ScrapeResponse] = None
+    error: Optional[str] = None
 
 
 @app.get("/")
@@ -59,11 +356,35 @@ async def root():
     return {
         "status": "running",
         "message": "Shein Cart Scraper API",
-        "playwright_available": async_playwright is not None
+        "playwright_available": async_playwright is not None,
+        "browser_pool": browser_pool.stats(),
+        "admission": admission.stats(),
+        "cache": result_cache.stats(),
+        "share_resolver": share_resolver.stats(),
+        "inflight": inflight_scrapes.stats(),
+        "tiers": tier_stats.snapshot(),
+        "jobs": job_queue.stats(),
+        "request_filter": request_filter.stats(),
+        "diagnostics": diagnostics.stats(),
+        "parse_pool": parse_pool.stats(),
+        "http_client": client_stats(http_client),
+        "item_aliases": ITEM_SCHEMA.stats(),
+        "exchange_rates": rate_table.stats(),
+        "logging": logs.stats()
     }
 
 
-@app.post("/scrape", response_model=ScrapeResponse)
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    rendered = metrics.render()
+    if rendered is None:
+        return PlainTextResponse("prometheus_client is not installed\n", status_code=503)
+    body, content_type = rendered
+    return Response(content=body, media_type=content_type)
+
+
+@app.post("/scrape", response_model=ScrapeResponse, response_model_exclude_none=True, response_class=ScrapeJSONResponse)
 async def scrape_cart(request: ScrapeRequest):
     """
     Scrape a Shein cart URL and return items
@@ -71,14 +392,186 @@ async def scrape_cart(request: ScrapeRequest):
     Note: Due to Shein's anti-bot measures, this may not always work.
     The URL must be a direct cart share URL.
     """
-    if not async_playwright:
-        raise HTTPException(
-            status_code=500,
-            detail="Playwright not installed on server"
+    return await run_scrape(request.url, refresh=request.refresh)
+
+
+@app.post("/scrape/jobs", response_model=ScrapeJob, status_code=202, response_model_exclude_none=True, response_class=ScrapeJSONResponse)
+async def create_scrape_job(request: ScrapeJobRequest):
+    """
+    Queue a scrape and return immediately
+
+    Poll GET /scrape/jobs/{job_id} until status is "done" or "failed".
+    """
+    # Cached carts do not need to wait behind browser work; results are keyed
+    # by the landing URL, so look up share links already resolved. Fetching a
+    # new one is left to the job, so this returns without network calls.
+    cached = None
+    if not request.refresh:
+        cached = await cached_response(cart_key(await resolve_cart_url(request.url, fetch=False)))
+    
+    try:
+        job = job_queue.submit(
+            request.url,
+            priority=request.priority,
+            refresh=request.refresh,
+            result=cached
+        )
+    except JobQueueFull:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Too many queued scrapes, try again shortly"},
+            headers={"Retry-After": "10"}
         )
     
+    return job_to_model(job)
+
+
+@app.get("/scrape/jobs/{job_id}", response_model=ScrapeJob, response_model_exclude_none=True, response_class=ScrapeJSONResponse)
+async def get_scrape_job(job_id: str):
+    """Report the status (and result, once finished) of a scrape job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job_to_model(job)
+
+
+@app.post("/scrape/batch")
+async def scrape_batch(request: BatchScrapeRequest):
+    """
+    Scrape many carts concurrently and stream the results as NDJSON
+    
+    Each line is one cart (a ScrapeResponse plus `url` and `indexes`), sent
+    as soon as that cart is done; the last line is a summary. Duplicate URLs
+    (same cart) are scraped once.
+    """
+    # Dedupe by cart, keeping the positions each cart was requested at
+    carts: Dict[str, List[int]] = {}
+    urls: Dict[str, str] = {}
+    for index, url in enumerate(request.urls):
+        key = cart_key(url)
+        carts.setdefault(key, []).append(index)
+        urls.setdefault(key, url)
+    
+    concurrency = min(request.concurrency or config.BATCH_CONCURRENCY, config.BATCH_CONCURRENCY)
+    timeout = min(request.deadline or config.BATCH_DEADLINE, config.BATCH_DEADLINE)
+    return StreamingResponse(
+        stream_batch(urls, carts, request.refresh, max(1, concurrency), timeout),
+        media_type="application/x-ndjson"
+    )
+
+
+async def stream_batch(urls: Dict[str, str], carts: Dict[str, List[int]], refresh: bool, concurrency: int, timeout: float):
+    """Run the batch's scrapes and yield one JSON line per cart as they finish"""
+    started = time.monotonic()
+    deadline = started + timeout
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def scrape_one(key: str) -> BatchScrapeResult:
+        url = urls[key]
+        try:
+            async with semaphore:
+                response = await run_batch_scrape(url, refresh, deadline)
+        except asyncio.TimeoutError:
+            response = ScrapeResponse(success=False, items=[], total_items=0, message="Error: batch deadline exceeded")
+        except HTTPException as e:
+            response = ScrapeResponse(success=False, items=[], total_items=0, message=f"Error: {e.detail}")
+        return BatchScrapeResult(url=url, indexes=carts[key], **dict(response))
+    
+    tasks = [asyncio.ensure_future(scrape_one(key)) for key in urls]
+    succeeded = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            succeeded += result.success
+            yield result.model_dump_json(exclude_none=True) + "\n"
+    finally:
+        # The client went away: stop waiting (shared scrapes keep running)
+        for task in tasks:
+            task.cancel()
+    
+    summary = {
+        "done": True,
+        "carts": len(tasks),
+        "succeeded": succeeded,
+        "failed": len(tasks) - succeeded,
+        "elapsed": round(time.monotonic() - started, 2),
+    }
+    logger.info("Batch of %d carts finished in %.1fs", len(tasks), summary["elapsed"], extra={"batch": summary})
+    yield json.dumps(summary) + "\n"
+
+
+async def run_batch_scrape(url: str, refresh: bool, deadline: float) -> ScrapeResponse:
+    """run_scrape that waits out a busy browser pool, up to the batch deadline"""
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise asyncio.TimeoutError
+        try:
+            return await asyncio.wait_for(run_scrape(url, refresh=refresh), remaining)
+        except Overloaded as e:
+            await asyncio.sleep(min(e.retry_after, max(0.0, deadline - time.monotonic())))
+
+
+def job_to_model(job) -> ScrapeJob:
+    return ScrapeJob(
+        job_id=job.id,
+        status=job.status,
+        url=job.url,
+        priority=job.priority,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        result=job.result,
+        error=job.error
+    )
+
+
+async def cached_response(key: str) -> Optional[ScrapeResponse]:
+    """Build a response from the result cache, or None on a miss"""
+    cached = await result_cache.get(key)
+    if cached is None:
+        return None
+    return ScrapeResponse(
+        success=True,
+        items=cached.value,
+        total_items=len(cached.value),
+        message="Successfully scraped cart (cached)",
+        cache_hit=True,
+        cache_age=round(cached.age, 1)
+    )
+
+
+async def resolve_cart_url(url: str, fetch: bool = True) -> str:
+    """
+    The cart landing URL of a share link (cached), or `url` itself
+
+    With fetch=False only share links resolved before are looked up.
+    """
+    if is_share_url(url):
+        if not fetch:
+            return await share_resolver.cached(url) or url
+        # Key the cart by its group_id and skip the share page on later requests
+        with metrics.stage("resolve"):
+            landing_url = await share_resolver.resolve(url)
+        if landing_url:
+            logger.info("Cart landing URL: %s", landing_url)
+            return landing_url
+    return url
+
+
+async def run_scrape(url: str, refresh: bool = False) -> ScrapeResponse:
+    """Serve a cart from cache or scrape it; shared by /scrape and the job workers"""
     try:
-        items = await scrape_shein_cart(request.url)
+        url = await resolve_cart_url(url)
+        key = cart_key(url)
+        if not refresh:
+            with metrics.stage("cache"):
+                cached = await cached_response(key)
+            if cached is not None:
+                metrics.record_source("cache")
+                return cached
+        
+        items, _ = await inflight_scrapes.do(key, lambda: scrape_and_cache(key, url))
         
         return ScrapeResponse(
             success=True,
@@ -87,6 +580,8 @@ async def scrape_cart(request: ScrapeRequest):
             message="Successfully scraped cart"
         )
     
+    except (Overloaded, HTTPException):
+        raise
     except Exception as e:
         return ScrapeResponse(
             success=False,
@@ -96,31 +591,76 @@ async def scrape_cart(request: ScrapeRequest):
         )
 
 
+async def run_scrape_job(job) -> ScrapeResponse:
+    """
+    Job workers retry when the browser is saturated, for up to JOB_MAX_WAIT
+    seconds; an unsuccessful scrape fails the job
+    """
+    logs.request_id_var.set(f"job-{job.id}")
+    deadline = time.monotonic() + config.JOB_MAX_WAIT
+    while True:
+        try:
+            response = await run_scrape(job.url, refresh=job.refresh)
+            break
+        except Overloaded as e:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise JobFailed(f"Server busy for {config.JOB_MAX_WAIT}s: {e.detail}")
+            await asyncio.sleep(min(e.retry_after, remaining))
+    if not response.success:
+        raise JobFailed(response.message or "Scrape failed")
+    return response
+
+
+async def scrape_and_cache(key: str, url: str) -> List[CartItem]:
+    """Scrape a cart and store non-empty results in the result cache"""
+    items = await scrape_tiered(url)
+    
+    # Only cache real results so retries of failed scrapes go to Shein again
+    if items:
+        await result_cache.set(key, [item.model_dump(exclude_none=True) for item in items])
+    
+    return items
+
+
+async def scrape_tiered(url: str) -> List[CartItem]:
+    """Try the cheap HTTP tier first and escalate to the browser only if it finds nothing"""
+    if config.HTTP_FAST_PATH:
+        with metrics.stage("http_tier"):
+            items = await http_tier.scrape(url)
+        tier_stats.record("http", bool(items))
+        if items:
+            logger.info("HTTP tier found %d items, skipping browser", len(items))
+            metrics.record_source("http")
+            return items
+    
+    if not async_playwright:
+        raise HTTPException(
+            status_code=500,
+            detail="Playwright not installed on server"
+        )
+    
+    items = await scrape_shein_cart(url)
+    tier_stats.record("browser", bool(items))
+    return items
+
+
 async def scrape_shein_cart(url: str) -> List[CartItem]:
-    """Scrape cart using Playwright with optimizations"""
+    """Scrape cart using a pooled Playwright browser"""
     items = []
+    source = "empty"
     
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True,
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--disable-dev-shm-usage',
-                '--no-sandbox',
-                '--disable-gpu',
-                '--disable-software-rasterizer',
-                '--disable-extensions'
-            ]
-        )
+    acquire_started = time.perf_counter()
+    async with browser_pool.context(
+        user_agent='Mozilla/5.0 (iPhone; CPU iPhone OS 16_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.0 Mobile/15E148 Safari/604.1',
+        viewport={'width': 375, 'height': 812},
+        locale='en-US'
+    ) as context:
+        metrics.observe("browser_acquire", time.perf_counter() - acquire_started)
+        setup_started = time.perf_counter()
         
-        context = await browser.new_context(
-            user_agent='Mozilla/5.0 (iPhone; CPU iPhone OS 16_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.0 Mobile/15E148 Safari/604.1',
-            viewport={'width': 375, 'height': 812},
-            locale='en-US'
-        )
-        
-        # Block unnecessary resources to speed up loading
-        await context.route("**/*", lambda route: route.abort() if route.request.resource_type in ["image", "stylesheet", "font", "media"] else route.continue_())
+        # Block static assets and trackers (matched in the driver, not in Python)
+        filter_stats = await request_filter.install(context)
         
         # Anti-detection
         await context.add_init_script("""
@@ -130,285 +670,334 @@ async def scrape_shein_cart(url: str) -> List[CartItem]:
         """)
         
         page = await context.new_page()
+        capture = CartResponseCapture(page, extract_payload_items) if config.NETWORK_CAPTURE else None
+        readiness = CartReadiness(page, capture=capture)
+        metrics.observe("page_setup", time.perf_counter() - setup_started)
         
         try:
             # Load page with optimized timeout
-            print(f"Loading URL: {url}")
-            try:
-                await page.goto(url, wait_until='domcontentloaded', timeout=30000)
-            except Exception as e:
-                print(f"Page load warning: {e}")
-                # Try to continue anyway if partially loaded
+            logger.info("Loading URL: %s", url)
+            with metrics.stage("goto"):
+                try:
+                    await page.goto(url, wait_until='domcontentloaded', timeout=30000)
+                except Exception as e:
+                    logger.warning("Page load warning: %s", e)
+                    # Try to continue anyway if partially loaded
             
-            # Wait for content with reduced time
-            print("Waiting for content to render...")
-            await asyncio.sleep(5)
+            # Wait until cart data shows up instead of a fixed sleep
+            deadline = time.monotonic() + config.READINESS_TIMEOUT
+            with metrics.stage("readiness"):
+                signal = await readiness.wait(timeout=config.READINESS_TIMEOUT)
+            logger.info("Page ready (%s)", signal)
             
-            # Get HTML content for debugging
-            html = await page.content()
-            print(f"Loaded HTML content ({len(html)} chars)")
+            # Best case: the cart API response already gave us every item
+            if capture and capture.items:
+                logger.info("Captured %d items from %s", len(capture.items), capture.source_url)
+                metrics.record_source("capture")
+                return capture.items
             
-            # Try to extract from JavaScript (simplified)
-            cart_data = await page.evaluate('''() => {
-                if (window.__NUXT__) return { source: 'NUXT', data: window.__NUXT__ };
-                if (window.__INITIAL_STATE__) return { source: 'STATE', data: window.__INITIAL_STATE__ };
-                if (window.gbRaidData) return { source: 'RAID', data: window.gbRaidData };
-                return null;
-            }''')
+            # Search the JS state in the page; only the candidate list comes back
+            with metrics.stage("js_state"):
+                cart_data = await fetch_cart_candidates(
+                    page,
+                    JS_STATE_GLOBALS,
+                    name_fields=ITEM_NAME_KEYS,
+                    fields=ITEM_FIELDS,
+                    objects=ITEM_OBJECTS,
+                    paths=CART_PATHS,
+                    max_depth=config.CART_SEARCH_MAX_DEPTH,
+                    max_nodes=config.CART_SEARCH_MAX_NODES,
+                )
             
             if cart_data:
-                print(f"Found JS data source: {cart_data.get('source')}")
-                items = parse_cart_data(cart_data['data'])
-                print(f"Parsed {len(items)} items from JS")
+                items = parse_item_list(cart_data['items'])
+                logger.info("Parsed %d items from JS data source %s (%s)", len(items), cart_data['source'], cart_data['path'] or 'root')
+                if items:
+                    source = cart_data['source']
             
             # Try DOM extraction if no items found
             if not items:
-                print("No items from JS, trying DOM extraction...")
-                items = await extract_from_dom(page)
-                print(f"Found {len(items)} items from DOM")
+                logger.info("No items from JS, trying DOM extraction")
+                remaining = deadline - time.monotonic()
+                if signal != 'dom' and remaining > 0:
+                    # Globals can exist before the cart renders; wait for the
+                    # items to appear in the DOM or in a cart API response
+                    with metrics.stage("dom_wait"):
+                        signal = await readiness.wait(timeout=remaining, signals=('capture', 'dom'))
+                if capture and capture.items:
+                    logger.info("Captured %d items from %s", len(capture.items), capture.source_url)
+                    metrics.record_source("capture")
+                    return capture.items
+                with metrics.stage("dom_extract"):
+                    items = await extract_from_dom(page)
+                logger.info("Found %d items from DOM", len(items))
+                if items:
+                    source = "dom"
+            
+            if not items:
+                await diagnostics.capture(page, logs.request_id_var.get(), reason="no_items", signal=signal)
             
         except Exception as e:
-            print(f"Error scraping: {e}")
+            logger.exception("Error scraping: %s", e)
+            await diagnostics.capture(page, logs.request_id_var.get(), reason="error", error=repr(e))
         finally:
-            await browser.close()
+            if capture:
+                capture.close()
+            logger.info(
+                "Blocked %d requests (~%d KB saved)",
+                filter_stats.requests_blocked, filter_stats.bytes_saved // 1024,
+                extra={"blocked": filter_stats.as_dict()},
+            )
     
+    metrics.record_source(source)
     return items
 
 
+# Runs the whole selector cascade inside the page and returns plain rows, so a
+# cart costs one CDP round-trip instead of several per field per element.
+EXTRACT_DOM_JS = '''() => {
+    const containerSelectors = [
+        '[class*="cart-item"]',
+        '[class*="goods-item"]',
+        '[class*="product-item"]',
+        '[class*="CartItem"]',
+    ];
+    const skuSelectors = [
+        '[class*="goods-id"]',
+        '[class*="product-id"]',
+        '[class*="sku"]',
+        '[data-goods-id]',
+        '[data-product-id]',
+        '[data-sku]',
+    ];
+    const nameSelectors = [
+        '[class*="goods-name"]',
+        '[class*="product-name"]',
+        '[class*="goods-title"]',
+        'h3',
+        'h2',
+    ];
+    const imgSelectors = [
+        'img[class*="goods-img"]',
+        'img[class*="product-img"]',
+        'img[src*="thumbnail"]',
+        'img:first-of-type',
+    ];
+    const text = (el) => (el && el.innerText) || '';
+
+    const counts = {};
+    for (const selector of containerSelectors) {
+        const elements = document.querySelectorAll(selector);
+        counts[selector] = elements.length;
+        const rows = [];
+
+        for (const elem of elements) {
+            // Skip tiny nested elements (hidden elements have no box and are kept)
+            if (elem.getClientRects().length && elem.getBoundingClientRect().height < 80) continue;
+
+            const row = {};
+
+            for (const skuSel of skuSelectors) {
+                const skuElem = elem.querySelector(skuSel);
+                if (!skuElem) continue;
+                const sku = text(skuElem) || skuElem.getAttribute('data-goods-id') || skuElem.getAttribute('data-sku');
+                if (sku && sku.trim()) { row.sku = sku.trim(); break; }
+            }
+            if (!row.sku) {
+                for (const attr of ['data-goods-id', 'data-product-id', 'data-sku', 'data-id']) {
+                    const val = elem.getAttribute(attr);
+                    if (val) { row.sku = val; break; }
+                }
+            }
+            if (!row.sku) {
+                const link = elem.querySelector('a[href*="goods_id"], a[href*="product"], a[href*="-p-"]');
+                if (link) row.href = link.getAttribute('href');
+            }
+
+            for (const nameSel of nameSelectors) {
+                const nameElem = elem.querySelector(nameSel);
+                if (!nameElem) continue;
+                const name = text(nameElem).trim();
+                if (name.length > 10) { row.name = name; break; }
+            }
+            // Rows without a name are dropped by the caller anyway
+            if (!row.name) continue;
+
+            const priceElem = elem.querySelector('[class*="sale-price"], [class*="current-price"], [class*="price"]:first-child');
+            if (priceElem) row.price = text(priceElem);
+
+            for (const imgSel of imgSelectors) {
+                const img = elem.querySelector(imgSel);
+                if (!img) continue;
+                const src = img.getAttribute('src') || img.getAttribute('data-src');
+                if (src && src.trim() && !src.toLowerCase().includes('placeholder')) { row.image = src; break; }
+            }
+
+            const qtyElem = elem.querySelector('input[type="number"], [class*="quantity"] input, [class*="num"] input');
+            if (qtyElem) row.quantity = qtyElem.getAttribute('value');
+
+            const colorElem = elem.querySelector('[class*="color"], [class*="Color"]');
+            if (colorElem) row.color = text(colorElem);
+
+            const sizeElem = elem.querySelector('[class*="size"], [class*="Size"]');
+            if (sizeElem) row.size = text(sizeElem);
+
+            rows.push(row);
+        }
+
+        if (rows.length) return { selector, counts, rows };
+    }
+    return { selector: null, counts, rows: [] };
+}'''
+
+
 async def extract_from_dom(page) -> List[CartItem]:
     """Extract items from DOM with improved SKU and deduplication"""
+    result = await page.evaluate(EXTRACT_DOM_JS)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("DOM selector counts: %s (matched %s)", result['counts'], result['selector'])
+    
+    return dedupe_dom_rows(result['rows'])
+
+
+def dedupe_dom_rows(rows: List[dict]) -> List[CartItem]:
+    """Normalize raw DOM rows into CartItems, deduplicating by SKU then name"""
     items = []
     seen_skus = set()  # Track by SKU primarily
     seen_names = set()  # Fallback to name if no SKU
     
-    # Try comprehensive selectors
-    selectors = [
-        '[class*="cart-item"]',
-        '[class*="goods-item"]',
-        '[class*="product-item"]',
-        '[class*="CartItem"]',
-    ]
-    
-    for selector in selectors:
-        elements = await page.query_selector_all(selector)
-        print(f"Selector '{selector}': found {len(elements)} elements")
-        if not elements:
+    for row in rows:
+        item_data = normalize_dom_row(row)
+        if not item_data.get('name'):
             continue
         
-        for elem in elements:
-            item_data = {}
-            
-            # Check element size - skip tiny nested elements
-            try:
-                box = await elem.bounding_box()
-                if box and box['height'] < 80:  # Increased threshold
-                    continue
-            except:
-                pass
-            
-            # Extract SKU first (most important for ordering)
-            sku_selectors = [
-                '[class*="goods-id"]',
-                '[class*="product-id"]',
-                '[class*="sku"]',
-                '[data-goods-id]',
-                '[data-product-id]',
-                '[data-sku]',
-            ]
-            for sku_sel in sku_selectors:
-                sku_elem = await elem.query_selector(sku_sel)
-                if sku_elem:
-                    sku = await sku_elem.inner_text() or await sku_elem.get_attribute('data-goods-id') or await sku_elem.get_attribute('data-sku')
-                    if sku and sku.strip():
-                        item_data['sku'] = sku.strip()
-                        break
-            
-            # Try to extract SKU from element attributes if not found
-            if not item_data.get('sku'):
-                for attr in ['data-goods-id', 'data-product-id', 'data-sku', 'data-id']:
-                    val = await elem.get_attribute(attr)
-                    if val:
-                        item_data['sku'] = val
-                        break
-            
-            # Try to extract SKU from product links
-            if not item_data.get('sku'):
-                link_elem = await elem.query_selector('a[href*="goods_id"], a[href*="product"], a[href*="-p-"]')
-                if link_elem:
-                    href = await link_elem.get_attribute('href')
-                    if href:
-                        import re
-                        # Try to extract goods_id from URL patterns
-                        # Pattern 1: goods_id=123456
-                        match = re.search(r'goods_id=(\d+)', href)
-                        if match:
-                            item_data['sku'] = match.group(1)
-                        else:
-                            # Pattern 2: -p-123456
-                            match = re.search(r'-p-(\d+)', href)
-                            if match:
-                                item_data['sku'] = match.group(1)
-            
-            # Extract name
-            name_selectors = [
-                '[class*="goods-name"]',
-                '[class*="product-name"]', 
-                '[class*="goods-title"]',
-                'h3',
-                'h2',
-            ]
-            for name_sel in name_selectors:
-                name_elem = await elem.query_selector(name_sel)
-                if name_elem:
-                    text = await name_elem.inner_text()
-                    if text and len(text.strip()) > 10:
-                        item_data['name'] = text.strip()
-                        break
-            
-            # Extract price - get ONLY the current/sale price (first price element)
-            price_elem = await elem.query_selector('[class*="sale-price"], [class*="current-price"], [class*="price"]:first-child')
-            if price_elem:
-                text = await price_elem.inner_text()
-                # Extract only numbers and currency
-                if text:
-                    import re
-                    # Match price pattern: R123.45 or R123
-                    match = re.search(r'[R$€£¥]\s*\d+(?:\.\d{2})?', text)
-                    if match:
-                        item_data['price'] = match.group(0).strip()
-            
-            # Extract image - prefer main product image
-            img_selectors = [
-                'img[class*="goods-img"]',
-                'img[class*="product-img"]',
-                'img[src*="thumbnail"]',
-                'img:first-of-type',
-            ]
-            for img_sel in img_selectors:
-                img = await elem.query_selector(img_sel)
-                if img:
-                    src = await img.get_attribute('src') or await img.get_attribute('data-src')
-                    if src and 'placeholder' not in src.lower() and src.strip():
-                        # Convert thumbnail to larger image
-                        src = src.replace('_thumbnail_', '_').replace('240x', '480x')
-                        if not src.startswith('http'):
-                            src = 'https:' + src if src.startswith('//') else 'https://img.shein.com' + src
-                        item_data['image'] = src
-                        break
-            
-            # Extract quantity
-            qty_elem = await elem.query_selector('input[type="number"], [class*="quantity"] input, [class*="num"] input')
-            if qty_elem:
-                qty = await qty_elem.get_attribute('value')
-                if qty:
-                    try:
-                        item_data['quantity'] = str(int(qty))
-                    except:
-                        item_data['quantity'] = "1"
-            
-            # Extract color and size if available
-            color_elem = await elem.query_selector('[class*="color"], [class*="Color"]')
-            if color_elem:
-                color_text = await color_elem.inner_text()
-                if color_text:
-                    item_data['color'] = color_text.strip()
-            
-            size_elem = await elem.query_selector('[class*="size"], [class*="Size"]')
-            if size_elem:
-                size_text = await size_elem.inner_text()
-                if size_text:
-                    item_data['size'] = size_text.strip()
-            
-            # Deduplicate: prioritize SKU, fallback to name
-            if item_data.get('name'):
-                sku = item_data.get('sku')
-                name = item_data.get('name')
-                
-                # Check if already seen
-                if sku and sku in seen_skus:
-                    continue
-                if not sku and name in seen_names:
-                    continue
-                
-                # Add to seen sets
-                if sku:
-                    seen_skus.add(sku)
-                seen_names.add(name)
-                
-                # Add item
-                items.append(CartItem(**item_data))
-                print(f"Added item: {name[:50]}... | SKU: {sku or 'N/A'} | Price: {item_data.get('price', 'N/A')} | Size: {item_data.get('size', 'N/A')} | Color: {item_data.get('color', 'N/A')}")
+        sku = item_data.get('sku')
+        name = item_data['name']
         
-        if items:
-            break
+        # Check if already seen
+        if sku and sku in seen_skus:
+            continue
+        if not sku and name in seen_names:
+            continue
+        
+        # Add to seen sets
+        if sku:
+            seen_skus.add(sku)
+        seen_names.add(name)
+        
+        # Add item
+        items.append(CartItem(**item_data))
+        logger.debug(
+            "Added item: %.50s | SKU: %s | Price: %s | Size: %s | Color: %s",
+            name, sku or 'N/A', item_data.get('price', 'N/A'), item_data.get('size', 'N/A'), item_data.get('color', 'N/A'),
+            extra={"sample": True},
+        )
     
     return items
 
 
-def parse_cart_data(data) -> List[CartItem]:
-    """Parse cart data from JavaScript objects"""
-    items = []
+def normalize_dom_row(row: dict) -> dict:
+    """Turn the raw strings collected in the page into CartItem fields"""
+    item_data = {}
     
-    if isinstance(data, dict):
-        for key in ['cart', 'cartItems', 'items', 'goods', 'goodsList']:
-            if key in data and isinstance(data[key], list):
-                for item in data[key]:
-                    if isinstance(item, dict):
-                        parsed = parse_single_item(item)
-                        if parsed:
-                            items.append(parsed)
-        
-        if not items:
-            for value in data.values():
-                if isinstance(value, (dict, list)):
-                    nested = parse_cart_data(value)
-                    if nested:
-                        items.extend(nested)
-                        break
+    if row.get('sku'):
+        item_data['sku'] = row['sku']
+    elif row.get('href'):
+        # Try to extract goods_id from URL patterns
+        # Pattern 1: goods_id=123456, Pattern 2: -p-123456
+        match = re.search(r'goods_id=(\d+)', row['href']) or re.search(r'-p-(\d+)', row['href'])
+        if match:
+            item_data['sku'] = match.group(1)
     
-    elif isinstance(data, list):
-        for item in data:
-            if isinstance(item, dict):
-                parsed = parse_single_item(item)
-                if parsed:
-                    items.append(parsed)
+    if row.get('name'):
+        item_data['name'] = row['name']
     
-    return items
-
-
-def parse_single_item(item: dict) -> Optional[CartItem]:
-    """Parse a single item"""
-    data = {}
+    # Show only the current/sale price (e.g. R123.45); keep the original as a number
+    if row.get('price'):
+        price = parse_price(row['price'], config.PRICE_CURRENCY)
+        if price:
+            item_data['price'] = price.text
+            if price.original is not None:
+                item_data['original_price_value'] = float(price.original)
     
-    for key in ['name', 'title', 'goodsName', 'goods_name']:
-        if key in item and item[key]:
-            data['name'] = str(item[key])
-            break
+    # Prefer the larger image over the thumbnail
+    if row.get('image'):
+        src = row['image'].replace('_thumbnail_', '_').replace('240x', '480x')
+        if not src.startswith('http'):
+            src = 'https:' + src if src.startswith('//') else 'https://img.shein.com' + src
+        item_data['image'] = src
     
-    for key in ['price', 'salePrice', 'unit_price']:
-        if key in item and item[key]:
-            data['price'] = str(item[key])
-            break
+    if row.get('quantity'):
+        try:
+            item_data['quantity'] = int(row['quantity'])
+        except ValueError:
+            item_data['quantity'] = 1
     
-    for key in ['quantity', 'qty', 'num']:
-        if key in item and item[key]:
-            data['quantity'] = str(item[key])
-            break
+    if row.get('color') and row['color'].strip():
+        item_data['color'] = row['color'].strip()
     
-    for key in ['image', 'img', 'goodsImg']:
-        if key in item and item[key]:
-            img = item[key]
-            if not img.startswith('http'):
-                img = 'https:' + img if img.startswith('//') else img
-            data['image'] = img
-            break
+    if row.get('size') and row['size'].strip():
+        item_data['size'] = row['size'].strip()
     
-    for key in ['sku', 'id', 'goodsId']:
-        if key in item and item[key]:
-            data['sku'] = str(item[key])
-            break
-    
-    return CartItem(**data) if data else None
+    return item_data
+
+
+# Page globals that may hold the cart, in the order they are searched
+JS_STATE_GLOBALS = [('NUXT', '__NUXT__'), ('STATE', '__INITIAL_STATE__'), ('RAID', 'gbRaidData')]
+CART_PATHS = parse_paths(config.CART_JSON_PATHS or DEFAULT_CART_PATHS)
+
+
+def parse_cart_data(data) -> List[CartItem]:
+    """Parse cart data from JavaScript objects"""
+    return find_cart_items(
+        data,
+        # The same list rule as the worker and in-page searches
+        lambda values: parse_item_list(values) if has_named_item(values, ITEM_NAME_KEYS) else [],
+        paths=CART_PATHS,
+        max_depth=config.CART_SEARCH_MAX_DEPTH,
+        max_nodes=config.CART_SEARCH_MAX_NODES,
+    )
+
+
+async def extract_page_items(html: str) -> List[CartItem]:
+    """Cart items from a page's embedded state (scanned in a parse worker if large)"""
+    try:
+        candidates = await parse_pool.run(
+            embedded_cart_candidates, html, config.HTML_PARSER, EMBEDDED_STATE_NAMES, CART_SEARCH,
+            size=len(html),
+        )
+    except ParseFailed as e:
+        # Leave this page to the browser tier
+        logger.warning("HTTP tier page not parsed: %s", e)
+        return []
+    return parse_item_list(candidates)
+
+
+async def extract_payload_items(body: bytes) -> List[CartItem]:
+    """Cart items from a cart API response body (decoded in a parse worker if large)"""
+    candidates = await parse_pool.run(payload_cart_candidates, body, CART_SEARCH, size=len(body))
+    return parse_item_list(candidates)
+
+
+def parse_item_list(values: list) -> List[CartItem]:
+    """Parse the dicts of a candidate cart list"""
+    return [CartItem(**data) for data in ITEM_SCHEMA.normalize_list(values)]
+
+
+# The shared alias table, limited to CartItem's fields; the in-page and
+# worker searches trim items to its aliases
+ITEM_SCHEMA = ItemSchema(fields=('name', 'price', 'quantity', 'image', 'sku', 'color', 'size'))
+ITEM_NAME_KEYS = list(ITEM_SCHEMA.aliases['name'])
+ITEM_FIELDS = ITEM_SCHEMA.keys
+ITEM_OBJECTS = ITEM_SCHEMA.object_keys
+CART_SEARCH = CartSearch(
+    name_fields=ITEM_NAME_KEYS,
+    fields=ITEM_FIELDS,
+    objects=ITEM_OBJECTS,
+    paths=CART_PATHS,
+    max_depth=config.CART_SEARCH_MAX_DEPTH,
+    max_nodes=config.CART_SEARCH_MAX_NODES,
+)
 
 
 if __name__ == "__main__":
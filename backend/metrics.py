@@ -0,0 +1,129 @@
+"""
+Prometheus metrics and per-stage timing
+
+Every step of the scrape pipeline runs inside `stage(name)`. That feeds the
+`scrape_stage_seconds` histogram, and also collects the timings of the
+current request for its `Server-Timing` header, so a single slow /scrape can
+be read in the browser devtools or with `curl -i`.
+
+Without prometheus_client installed the timings and the Server-Timing header
+still work, and /metrics reports that it is unavailable.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:
+    CollectorRegistry = None
+
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+if CollectorRegistry is not None:
+    REGISTRY = CollectorRegistry()
+    STAGE_SECONDS = Histogram(
+        'scrape_stage_seconds', 'Time spent in each scrape pipeline stage',
+        ['stage'], buckets=STAGE_BUCKETS, registry=REGISTRY,
+    )
+    REQUEST_SECONDS = Histogram(
+        'scrape_request_seconds', 'End-to-end latency of scrape requests',
+        ['route', 'status'], buckets=STAGE_BUCKETS, registry=REGISTRY,
+    )
+    SOURCE_TOTAL = Counter(
+        'scrape_source_total', 'Scrapes by the source that produced the items '
+        '(cache, http, capture, NUXT, STATE, RAID, dom, empty)',
+        ['source'], registry=REGISTRY,
+    )
+else:
+    REGISTRY = None
+
+
+class StageTimings:
+    """Stage durations of one request, rendered as a Server-Timing header"""
+
+    def __init__(self):
+        self.entries: List[Tuple[str, float]] = []
+
+    def add(self, name: str, seconds: float):
+        self.entries.append((name, seconds))
+
+    def header(self, total: Optional[float] = None) -> str:
+        entries = list(self.entries)
+        if total is not None:
+            entries.append(('total', total))
+        return ', '.join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in entries)
+
+
+_request_timings: ContextVar[Optional[StageTimings]] = ContextVar('request_timings', default=None)
+
+
+def start_request() -> StageTimings:
+    """Collect the stage timings of the current request (and tasks it starts)"""
+    timings = StageTimings()
+    _request_timings.set(timings)
+    return timings
+
+
+def observe(name: str, seconds: float):
+    """Record a stage that was timed by the caller"""
+    if REGISTRY is not None:
+        STAGE_SECONDS.labels(stage=name).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block as pipeline stage `name`"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started)
+
+
+def record_source(source: str):
+    if REGISTRY is not None:
+        SOURCE_TOTAL.labels(source=source).inc()
+
+
+def observe_request(route: str, status: int, seconds: float):
+    if REGISTRY is not None:
+        REQUEST_SECONDS.labels(route=route, status=str(status)).observe(seconds)
+
+
+class _StatsCollector:
+    """Exposes numeric values of `stats()` dicts as gauges at scrape time"""
+
+    def __init__(self, sources: Dict[str, Callable[[], dict]]):
+        self.sources = sources
+
+    def collect(self):
+        for prefix, stats in self.sources.items():
+            try:
+                values = stats()
+            except Exception:
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                yield GaugeMetricFamily(f"{prefix}_{key}", f"{prefix} {key.replace('_', ' ')}", value=value)
+
+
+def register_stats(sources: Dict[str, Callable[[], dict]]):
+    """Publish gauges from component stats, e.g. {'browser_pool': pool.stats}"""
+    if REGISTRY is not None:
+        REGISTRY.register(_StatsCollector(sources))
+
+
+def render() -> Optional[Tuple[bytes, str]]:
+    """(body, content type) for /metrics, or None without prometheus_client"""
+    if REGISTRY is None:
+        return None
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
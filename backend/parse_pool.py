@@ -0,0 +1,156 @@
+"""
+Process pool for CPU-bound page parsing
+
+The backend is one async process, so scanning a multi-megabyte page and
+decoding its `__NUXT__` / `__INITIAL_STATE__` JSON inside a request handler
+stalls every other request for as long as it takes. Large pages and cart
+API payloads are therefore parsed in a small ProcessPoolExecutor:
+
+- the worker scans the HTML, decodes the JSON and runs the bounded cart
+  search (cart_search.find_cart_items);
+- only the candidate item list, trimmed to the fields the item parser reads,
+  is pickled back to the event loop, where it is turned into CartItems.
+
+Workers are started (and have imported the parsers) before the first
+request. Inputs smaller than `min_bytes` are parsed inline, where they cost
+less than the round-trip to a worker. At most `max_pending` parses are
+queued for the workers; later ones wait for a slot instead of piling up.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from cart_search import CART_LIST_KEYS, MAX_DEPTH, MAX_NODES, find_cart_items, trim_candidates
+from html_scan import find_embedded_state, loads
+
+
+logger = logging.getLogger(__name__)
+
+
+class ParseFailed(Exception):
+    """A worker died parsing this input (e.g. OOM-killed); it is not parsed again"""
+
+
+class CartSearch(NamedTuple):
+    """What a worker looks for; sent along with every parse"""
+    name_fields: Sequence[str]
+    fields: Optional[Sequence[str]] = None
+    objects: Optional[Dict[str, Sequence[str]]] = None  # fields that may be dicts -> keys kept
+    keys: Sequence[str] = CART_LIST_KEYS
+    paths: Sequence[Tuple[str, ...]] = ()
+    max_depth: int = MAX_DEPTH
+    max_nodes: int = MAX_NODES
+
+
+def _search(data: Any, search: CartSearch) -> List[dict]:
+    return find_cart_items(
+        data,
+        lambda values: trim_candidates(values, search.name_fields, search.fields, search.objects),
+        keys=search.keys,
+        paths=search.paths,
+        max_depth=search.max_depth,
+        max_nodes=search.max_nodes,
+    )
+
+
+def embedded_cart_candidates(html: str, parser: Optional[str], names: Sequence[str], search: CartSearch) -> List[dict]:
+    """Candidate cart items from a page's JSON script tags and state assignments"""
+    json_scripts, assignments = find_embedded_state(html, parser, names=names)
+    for text in json_scripts + [text for _, text in assignments]:
+        try:
+            data = loads(text)
+        except ValueError:
+            continue
+        items = _search(data, search)
+        if items:
+            return items
+    return []
+
+
+def payload_cart_candidates(body: bytes, search: CartSearch) -> List[dict]:
+    """Candidate cart items from a JSON response body (raises ValueError if it is not JSON)"""
+    return _search(loads(body), search)
+
+
+def _warm_up() -> int:
+    # Import the optional parsers now rather than during the first request
+    import html_scan
+    html_scan.available_parsers()
+    return multiprocessing.current_process().pid
+
+
+class ParsePool:
+    def __init__(self, workers: int = 2, min_bytes: int = 100_000, max_pending: Optional[int] = None):
+        self.workers = max(0, workers)
+        self.min_bytes = min_bytes
+        self.max_pending = max_pending or self.workers * 4
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.offloaded = 0
+        self.inline = 0
+        self.pending = 0
+        self.restarts = 0
+        self.failed = 0
+
+    async def start(self):
+        """Start the workers and wait until each has imported the parsers"""
+        if self.workers == 0 or self._executor is not None:
+            return
+        # spawn: forking a process that runs Playwright and logging threads is unsafe
+        self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        self._slots = asyncio.Semaphore(self.max_pending)
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(loop.run_in_executor(self._executor, _warm_up) for _ in range(self.workers)))
+        logger.info("Parse pool ready (%d workers, pids %s)", self.workers, sorted(set(pids)))
+
+    async def stop(self):
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, cancel_futures=True)
+
+    async def run(self, fn: Callable, *args, size: int = 0):
+        """
+        `fn(*args)` in a worker, or inline for inputs under `min_bytes` (or
+        without workers). Raises ParseFailed if the worker dies.
+        """
+        if self._executor is None or size < self.min_bytes:
+            self.inline += 1
+            return fn(*args)
+
+        async with self._slots:
+            executor = self._executor
+            if executor is None:
+                self.inline += 1
+                return fn(*args)
+            self.pending += 1
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+            except BrokenProcessPool:
+                # A worker died: replace the pool, but never retry the input that
+                # may have killed it, least of all in the server process
+                logger.warning("Parse pool broken by a %d-byte input, restarting it", size)
+                self.failed += 1
+                if self._executor is executor:
+                    self.restarts += 1
+                    self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+                    executor.shutdown(wait=False)
+                raise ParseFailed(f"parse worker died on a {size}-byte input") from None
+            finally:
+                self.pending -= 1
+        self.offloaded += 1
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers if self._executor is not None else 0,
+            "min_bytes": self.min_bytes,
+            "pending": self.pending,
+            "offloaded": self.offloaded,
+            "inline": self.inline,
+            "restarts": self.restarts,
+            "failed": self.failed,
+        }
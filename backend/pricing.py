@@ -0,0 +1,297 @@
+"""
+Price parsing and cart totals
+
+Shein shows prices as text, often the sale and the original price together
+("R148\nR168"). parse_price turns that into Decimal amounts with an ISO
+currency code, so the client gets numbers instead of re-parsing strings.
+
+Cart totals are converted with a RateTable: units of each currency per one
+unit of `base`, read from a JSON file (rates.json) and re-read in the
+background when it changes. The file stands in for a live rate source; a
+missing or broken file keeps the last good table (or DEFAULT_RATES).
+
+cart_totals sums a whole cart in one pass per source currency and converts
+each sum once, rather than converting item by item. Arithmetic is done in
+Decimal; amounts leave as numbers rounded to cents.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import unicodedata
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Dict, Iterable, NamedTuple, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Symbols and codes seen next to amounts; longer spellings first. None means
+# the currency cannot be told from the symbol (¥ is both JPY and CNY).
+CURRENCY_SYMBOLS: Dict[str, Optional[str]] = {
+    'ZAR': 'ZAR',
+    'USD': 'USD',
+    'US$': 'USD',
+    'CDF': 'CDF',
+    'EUR': 'EUR',
+    'GBP': 'GBP',
+    'JPY': 'JPY',
+    'CNY': 'CNY',
+    'RMB': 'CNY',
+    'FC': 'CDF',
+    'R': 'ZAR',
+    '$': 'USD',
+    '€': 'EUR',
+    '£': 'GBP',
+    '¥': None,
+}
+
+_SYMBOLS = '|'.join(re.escape(symbol) for symbol in CURRENCY_SYMBOLS)
+# Amounts with grouped thousands ("1,299.00", "1 299,00", "1.299,00") or plain
+# ones ("148", "148.50", "148,50"). Groups are split by spaces, not newlines,
+# which separate the sale and the original price.
+PRICE_RE = re.compile(
+    r'(?<![A-Za-z])(?P<symbol>' + _SYMBOLS + r')?[ \t\u00a0\u202f]*'
+    r'(?P<amount>\d{1,3}(?:[ \u00a0\u202f.,]\d{3})+(?:[.,]\d+)?|\d+(?:[.,]\d+)?)'
+    # A symbol after the amount ("1.299,00 €"), unless it starts the next price
+    r'(?:[ \t\u00a0\u202f]*(?P<suffix>' + _SYMBOLS + r')(?![A-Za-z])(?![ \t\u00a0\u202f]*\d))?'
+)
+_THOUSANDS_RE = re.compile(r'\d{1,3}(?:([.,])\d{3})(?:\1\d{3})*')
+
+# Per 1 USD; the rates the mobile app used to hard-code
+DEFAULT_RATES = {'USD': Decimal('1'), 'ZAR': Decimal('17.857'), 'CDF': Decimal('2500')}
+
+CENTS = Decimal('0.01')
+
+
+class Price(NamedTuple):
+    amount: Decimal  # what the item costs now
+    currency: Optional[str]  # ISO 4217 code, None if the symbol is unknown or ambiguous, or missing with no default
+    original: Optional[Decimal] = None  # struck-through price, if higher than `amount`
+    text: str = ''  # the part of the input that gave `amount`, e.g. "R148"
+
+
+def parse_amount(text: str) -> Decimal:
+    """
+    "1,299.50" / "1 299,50" / "1.299,50" -> Decimal('1299.50')
+
+    With one kind of separator, a lone comma or dot followed by exactly three
+    digits per group ("1,299", "1.299.000") groups thousands; otherwise it is
+    the decimal point ("148,50", "12.99").
+    """
+    text = re.sub(r'[ \u00a0\u202f]', '', text)
+    if ',' in text and '.' in text:
+        # The last separator is the decimal point
+        decimal = ',' if text.rfind(',') > text.rfind('.') else '.'
+        text = text.replace('.' if decimal == ',' else ',', '')
+    elif ',' in text or text.count('.') > 1:
+        if _THOUSANDS_RE.fullmatch(text):
+            text = text.replace(',', '').replace('.', '')
+    return Decimal(text.replace(',', '.'))
+
+
+def _has_symbol(match: re.Match) -> bool:
+    if match.group('symbol') or match.group('suffix'):
+        return True
+    # An unknown currency sign ("₹148")
+    before = match.string[:match.start('amount')].rstrip()
+    return bool(before) and unicodedata.category(before[-1]) == 'Sc'
+
+
+def _is_percent(match: re.Match) -> bool:
+    return match.string[match.end('amount'):].lstrip().startswith('%')
+
+
+def _currency(match: re.Match, default_currency: Optional[str]) -> Optional[str]:
+    symbol = match.group('symbol') or match.group('suffix')
+    if symbol:
+        return CURRENCY_SYMBOLS[symbol]
+    # An unknown currency sign is not the default currency
+    return None if _has_symbol(match) else default_currency
+
+
+def parse_price(text: str, default_currency: Optional[str] = None) -> Optional[Price]:
+    """
+    "R148\\nR168" -> Price(148, 'ZAR', original=168); None if there is no amount
+
+    The first amount is the sale price, a higher second one in the same
+    currency the original. Amounts without a symbol are in
+    `default_currency`; unknown or ambiguous symbols give currency None.
+    Percentages are skipped, and when the text has a currency symbol only
+    amounts with one count, so badges and counts are not taken as prices.
+
+    >>> parse_price("R148\\nR168")
+    Price(amount=Decimal('148'), currency='ZAR', original=Decimal('168'), text='R148')
+    >>> parse_price("-41% R99 R168")
+    Price(amount=Decimal('99'), currency='ZAR', original=Decimal('168'), text='R99')
+    >>> parse_price("2 x R 1 299,00", 'ZAR')
+    Price(amount=Decimal('1299.00'), currency='ZAR', original=None, text='R 1 299,00')
+    >>> parse_price("1.299,00 €")
+    Price(amount=Decimal('1299.00'), currency='EUR', original=None, text='1.299,00 €')
+    >>> parse_price("¥148", 'ZAR')
+    Price(amount=Decimal('148'), currency=None, original=None, text='¥148')
+    >>> parse_price("148", 'ZAR')
+    Price(amount=Decimal('148'), currency='ZAR', original=None, text='148')
+    >>> parse_price("-41%") is None
+    True
+    """
+    matches = [match for match in PRICE_RE.finditer(str(text)) if not _is_percent(match)]
+    if any(_has_symbol(match) for match in matches):
+        matches = [match for match in matches if _has_symbol(match)]
+    if not matches:
+        return None
+    first = matches[0]
+    amount = parse_amount(first.group('amount'))
+    currency = _currency(first, default_currency)
+
+    original = None
+    if len(matches) > 1:
+        second = matches[1]
+        value = parse_amount(second.group('amount'))
+        if value > amount and _currency(second, default_currency) == currency:
+            original = value
+    return Price(amount, currency, original, first.group(0).strip())
+
+
+def to_decimal(value) -> Optional[Decimal]:
+    if value is None:
+        return None
+    try:
+        # str() so 0.1 stays 0.1 rather than its binary expansion
+        return Decimal(str(value))
+    except InvalidOperation:
+        return None
+
+
+class Rates(NamedTuple):
+    base: str
+    rates: Dict[str, Decimal]  # units per 1 `base`
+    updated: Optional[str]  # as given by the source
+    loaded_at: float
+
+    def convert(self, amount: Decimal, source: str, target: str) -> Optional[Decimal]:
+        """`amount` of `source` in `target`, or None if either rate is unknown"""
+        if source == target:
+            return amount
+        source_rate = self.rates.get(source)
+        target_rate = self.rates.get(target)
+        if not source_rate or target_rate is None:
+            return None
+        return amount / source_rate * target_rate
+
+
+class RateTable:
+    """Exchange rates from a local JSON file, re-read every `refresh` seconds if it changed"""
+
+    def __init__(self, path: Optional[str] = 'rates.json', refresh: float = 3600):
+        self.path = path
+        self.refresh = refresh
+        self.current = Rates('USD', dict(DEFAULT_RATES), None, time.time())
+        self._mtime: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self.loads = 0
+        self.failures = 0
+        self.load()
+
+    def load(self) -> bool:
+        """Read the file if it changed; keeps the current table on errors"""
+        if not self.path:
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime
+            if mtime == self._mtime:
+                return False
+            # A broken file is reported once, not on every refresh
+            self._mtime = mtime
+            with open(self.path, 'rb') as f:
+                data = json.load(f, parse_float=Decimal, parse_int=Decimal)
+            rates = {str(code).upper(): Decimal(rate) for code, rate in data['rates'].items()}
+            base = str(data.get('base', 'USD')).upper()
+            rates.setdefault(base, Decimal('1'))
+            # Numbers are read as Decimal; responses carry the date as text
+            updated = data.get('updated')
+            updated = None if updated is None else str(updated)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError, InvalidOperation) as e:
+            self.failures += 1
+            logger.warning("Could not load exchange rates from %s: %s", self.path, e)
+            return False
+
+        self.current = Rates(base, rates, updated, time.time())
+        self.loads += 1
+        logger.info("Loaded %d exchange rates from %s (updated %s)", len(rates), self.path, self.current.updated)
+        return True
+
+    def start(self):
+        if self._task is None and self.path and self.refresh > 0:
+            self._task = asyncio.ensure_future(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            task, self._task = self._task, None
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh)
+            await asyncio.to_thread(self.load)
+
+    def stats(self) -> dict:
+        return {
+            "currencies": len(self.current.rates),
+            "age": round(time.time() - self.current.loaded_at, 1),
+            "loads": self.loads,
+            "failures": self.failures,
+        }
+
+
+def cart_totals(items: Iterable, rates: Rates, currencies: Sequence[str]) -> dict:
+    """
+    Subtotals of a cart in each of `currencies`
+
+    `items` need `price_value`, `original_price_value`, `currency` and
+    `quantity` attributes (quantity defaults to 1). Items without a price or
+    currency are counted in `unpriced_items` and left out of the sums; with
+    no priced item at all there is no subtotal (None), rather than 0.
+    """
+    # One pass: sum sale and original amounts per source currency
+    sale: Dict[str, Decimal] = {}
+    original: Dict[str, Decimal] = {}
+    priced = unpriced = 0
+    for item in items:
+        amount = to_decimal(item.price_value)
+        if amount is None or not item.currency:
+            unpriced += 1
+            continue
+        quantity = 1 if item.quantity is None else item.quantity
+        full = to_decimal(item.original_price_value) or amount
+        sale[item.currency] = sale.get(item.currency, Decimal(0)) + amount * quantity
+        original[item.currency] = original.get(item.currency, Decimal(0)) + full * quantity
+        priced += 1
+
+    # Then one conversion per (source, target) pair
+    def convert(sums: Dict[str, Decimal]) -> Dict[str, float]:
+        totals = {}
+        for target in currencies:
+            total = Decimal(0)
+            for source, amount in sums.items():
+                converted = rates.convert(amount, source, target)
+                if converted is None:
+                    break
+                total += converted
+            else:
+                totals[target] = float(total.quantize(CENTS, ROUND_HALF_UP))
+        return totals
+
+    return {
+        "subtotal": convert(sale) if priced else None,
+        "original_subtotal": convert(original) if priced else None,
+        "source_currencies": sorted(sale),
+        "priced_items": priced,
+        "unpriced_items": unpriced,
+        # The rates of the item currencies too, so clients can redo the sums
+        "rates": {code: float(rates.rates[code]) for code in (*currencies, *sale) if code in rates.rates},
+        "rates_base": rates.base,
+        "rates_updated": rates.updated,
+    }
@@ -0,0 +1,164 @@
+"""
+Readiness-driven waiting for Shein cart pages
+
+Instead of sleeping a fixed amount of time after navigation, scrapers wait
+until the cart data is actually available and stop waiting as soon as one of
+these signals fires:
+
+- state:   a known global (window.__NUXT__, gbRaidData, ...) is defined
+- dom:     a cart-item selector matches an element
+- network: the cart API request completed (then a short grace period lets
+           the page render what it received)
+- capture: an attached response capture already holds the cart items
+
+If nothing fires before the deadline the caller carries on with whatever
+has loaded, exactly like the old fixed sleep did.
+"""
+
+import asyncio
+import re
+import time
+from typing import Optional, Sequence
+
+
+CART_ITEM_SELECTORS = [
+    '[class*="cart-item"]',
+    '[class*="goods-item"]',
+    '[class*="product-item"]',
+    '[class*="CartItem"]',
+]
+
+CART_STATE_GLOBALS = [
+    '__NUXT__',
+    '__INITIAL_STATE__',
+    'gbRaidData',
+    'gbRawData',
+    'cartData',
+]
+
+# XHR endpoints that carry the shared cart contents
+CART_API_PATTERN = re.compile(r'/(?:api|bff-api)/[^?]*cart', re.IGNORECASE)
+
+_READY_JS = '''([globals, selectors]) => {
+    for (const name of globals) {
+        if (window[name]) return 'state';
+    }
+    for (const selector of selectors) {
+        if (document.querySelector(selector)) return 'dom';
+    }
+    return false;
+}'''
+
+
+class CartReadiness:
+    """
+    Tracks readiness signals for one page.
+
+    Create it *before* `page.goto` so cart API responses that arrive during
+    navigation are not missed, then call `wait()` after navigation.
+    """
+
+    def __init__(
+        self,
+        page,
+        selectors: Sequence[str] = CART_ITEM_SELECTORS,
+        state_globals: Sequence[str] = CART_STATE_GLOBALS,
+        api_pattern: re.Pattern = CART_API_PATTERN,
+        capture=None,
+    ):
+        self.page = page
+        # Anything with a `ready` asyncio.Event, e.g. CartResponseCapture
+        self.capture = capture
+        self.selectors = list(selectors)
+        self.state_globals = list(state_globals)
+        self.api_pattern = api_pattern
+        self._api_done = asyncio.Event()
+        page.on("response", self._on_response)
+
+    def _on_response(self, response):
+        if response.ok and self.api_pattern.search(response.url):
+            self._api_done.set()
+
+    async def wait(
+        self,
+        timeout: float = 8.0,
+        signals: Sequence[str] = ('capture', 'state', 'dom', 'network'),
+        settle: float = 1.0,
+    ) -> str:
+        """
+        Wait until one of `signals` fires or `timeout` seconds pass.
+
+        Returns the signal that fired ('capture', 'state', 'dom', 'network')
+        or 'timeout'.
+        """
+        deadline = time.monotonic() + timeout
+        js_signals = [s for s in signals if s in ('state', 'dom')]
+
+        waiters = {}
+        if js_signals:
+            waiters['js'] = asyncio.ensure_future(self._wait_js(js_signals, timeout))
+        if 'network' in signals:
+            waiters['network'] = asyncio.ensure_future(self._api_done.wait())
+        if 'capture' in signals and self.capture is not None:
+            waiters['capture'] = asyncio.ensure_future(self.capture.ready.wait())
+        if not waiters:
+            return 'timeout'
+
+        js_waiter = waiters.get('js')
+        network_waiter = waiters.get('network')
+        capture_waiter = waiters.get('capture')
+        pending = set(waiters.values())
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=remaining,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    break
+
+                if capture_waiter in done:
+                    return 'capture'
+
+                if js_waiter in done and js_waiter.result():
+                    return js_waiter.result()
+
+                if network_waiter in done:
+                    # The cart API answered; give the page a moment to render it
+                    grace = min(settle, deadline - time.monotonic())
+                    render_waiters = [w for w in (capture_waiter, js_waiter) if w in pending]
+                    if render_waiters and grace > 0:
+                        finished, _ = await asyncio.wait(
+                            render_waiters,
+                            timeout=grace,
+                            return_when=asyncio.FIRST_COMPLETED,
+                        )
+                        if capture_waiter in finished:
+                            return 'capture'
+                        if js_waiter in finished and js_waiter.result():
+                            return js_waiter.result()
+                    return 'network'
+
+            return 'timeout'
+        finally:
+            for waiter in waiters.values():
+                if not waiter.done():
+                    waiter.cancel()
+
+    async def _wait_js(self, signals: Sequence[str], timeout: float) -> Optional[str]:
+        state_globals = self.state_globals if 'state' in signals else []
+        selectors = self.selectors if 'dom' in signals else []
+        try:
+            handle = await self.page.wait_for_function(
+                _READY_JS,
+                arg=[state_globals, selectors],
+                timeout=timeout * 1000,
+                polling=100,
+            )
+            return await handle.json_value()
+        except Exception:
+            return None
@@ -0,0 +1,215 @@
+"""
+Request filtering for scraper browser contexts
+
+The cart data comes from the document, Shein's scripts and its cart API
+calls. Images, stylesheets, fonts and third-party trackers only cost
+bandwidth and main-thread time, so they are aborted.
+
+Everything we block is folded into ONE regular expression that is handed to
+`context.route()`. Playwright matches regex routes inside the browser
+driver, so only the requests we abort reach Python; the rest load without a
+round-trip. (The old `"**/*"` route with a lambda sent every request of the
+page through Python.)
+
+Blocking by resource type is done through the URL too (file extensions of
+images, fonts, CSS and media). Extension-less assets are only caught in
+`strict` mode, which adds a catch-all route that checks each request's type
+against ALLOWED_RESOURCE_TYPES; it is exact but costs one round-trip per
+request again.
+
+Aborted requests have no size, so the bytes saved are an estimate from the
+typical size of each resource type (TYPICAL_SIZES).
+"""
+
+import re
+from typing import Dict, Iterable, Optional, Sequence
+
+# What a cart page needs; in strict mode every other type is aborted
+ALLOWED_RESOURCE_TYPES = ('document', 'script', 'xhr', 'fetch', 'other')
+
+# Analytics, ads and tag managers (subdomains are matched too). Shein's own
+# hosts, ltwebstatic.com included, must never be listed: they serve the
+# scripts that build the cart.
+TRACKER_DOMAINS = (
+    'google-analytics.com',
+    'analytics.google.com',
+    'googletagmanager.com',
+    'googleadservices.com',
+    'googlesyndication.com',
+    'doubleclick.net',
+    'facebook.net',
+    'facebook.com',
+    'analytics.tiktok.com',
+    'ads.tiktok.com',
+    'sc-static.net',
+    'tr.snapchat.com',
+    'ct.pinterest.com',
+    's.pinimg.com',
+    'static.ads-twitter.com',
+    'ads-api.twitter.com',
+    'bat.bing.com',
+    'clarity.ms',
+    'hotjar.com',
+    'criteo.com',
+    'criteo.net',
+    'cdn.cookielaw.org',
+    'onetrust.com',
+    'appsflyer.com',
+    'adjust.com',
+    'branch.io',
+    'sentry-cdn.com',
+    'nr-data.net',
+    'newrelic.com',
+    'riskified.com',
+    'forter.com',
+)
+
+# Resource types recognised by URL (the query string is ignored)
+STATIC_EXTENSIONS = (
+    'png', 'jpe?g', 'gif', 'webp', 'avif', 'svg', 'ico', 'bmp',
+    'css',
+    'woff2?', 'ttf', 'otf', 'eot',
+    'mp4', 'webm', 'mp3', 'ogg', 'm3u8',
+)
+
+# First-party tracking endpoints seen on Shein pages
+TRACKER_PATTERNS = (
+    r'/collect(?:[/?]|$)',
+    r'/gtag/js',
+    r'/pixel(?:[/?.]|$)',
+)
+
+# Rough transfer sizes (bytes) used to estimate what blocking saved
+TYPICAL_SIZES = {
+    'image': 30_000,
+    'stylesheet': 40_000,
+    'font': 45_000,
+    'media': 250_000,
+    'script': 60_000,
+    'xhr': 2_000,
+    'fetch': 2_000,
+    'ping': 500,
+    'other': 5_000,
+}
+DEFAULT_SIZE = 5_000
+
+
+def parse_list(spec) -> list:
+    """'a, b' (or a sequence) -> ['a', 'b']"""
+    if isinstance(spec, str):
+        spec = spec.split(',')
+    return [entry.strip() for entry in spec if entry and entry.strip()]
+
+
+def build_pattern(
+    domains: Iterable[str] = TRACKER_DOMAINS,
+    extensions: Iterable[str] = STATIC_EXTENSIONS,
+    patterns: Iterable[str] = TRACKER_PATTERNS,
+) -> Optional['re.Pattern']:
+    """
+    One case-insensitive regex matching every URL to block
+
+    Only syntax shared by Python and JavaScript is used, because Playwright
+    evaluates the pattern in the driver.
+    """
+    alternatives = []
+    domains = [re.escape(domain.lower().strip('.')) for domain in domains]
+    if domains:
+        alternatives.append(r'^[a-z]+://(?:[^/?#]*\.)?(?:' + '|'.join(domains) + r')(?::\d+)?(?:[/?#]|$)')
+    extensions = list(extensions)
+    if extensions:
+        alternatives.append(r'^[^?#]*\.(?:' + '|'.join(extensions) + r')(?:[?#]|$)')
+    alternatives.extend(patterns)
+    if not alternatives:
+        return None
+    return re.compile('|'.join(f'(?:{alternative})' for alternative in alternatives), re.IGNORECASE)
+
+
+class FilterStats:
+    """Requests aborted in one browser context"""
+
+    def __init__(self):
+        self.requests_blocked = 0
+        self.bytes_saved = 0
+        self.by_type: Dict[str, int] = {}
+
+    def add(self, resource_type: str):
+        self.requests_blocked += 1
+        self.bytes_saved += TYPICAL_SIZES.get(resource_type, DEFAULT_SIZE)
+        self.by_type[resource_type] = self.by_type.get(resource_type, 0) + 1
+
+    def as_dict(self) -> dict:
+        return {
+            "requests_blocked": self.requests_blocked,
+            "bytes_saved_estimate": self.bytes_saved,
+            "by_type": dict(self.by_type),
+        }
+
+
+class RequestFilter:
+    """
+    Blocklist + resource-type policy shared by every scraper
+
+    `install(context)` attaches the routes and returns the FilterStats of
+    that context; totals over all contexts are kept for the stats endpoint.
+    Pass `extensions=()` to let images and styles through (e.g. when a human
+    has to see the page) while still dropping trackers.
+    """
+
+    def __init__(
+        self,
+        domains: Sequence[str] = TRACKER_DOMAINS,
+        extensions: Sequence[str] = STATIC_EXTENSIONS,
+        patterns: Sequence[str] = TRACKER_PATTERNS,
+        allowed_types: Sequence[str] = ALLOWED_RESOURCE_TYPES,
+        strict: bool = False,
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self.strict = strict
+        self.allowed_types = frozenset(allowed_types)
+        self.pattern = build_pattern(domains, extensions, patterns)
+        self.totals = FilterStats()
+        self.contexts = 0
+
+    def blocks(self, url: str, resource_type: Optional[str] = None) -> bool:
+        """Whether a request would be aborted (same decision as the routes)"""
+        if not self.enabled:
+            return False
+        if self.pattern is not None and self.pattern.search(url):
+            return True
+        return self.strict and resource_type is not None and resource_type not in self.allowed_types
+
+    async def install(self, context) -> FilterStats:
+        """Attach the routes to a browser context (or page)"""
+        stats = FilterStats()
+        if not self.enabled:
+            return stats
+        self.contexts += 1
+
+        async def abort(route):
+            resource_type = route.request.resource_type
+            stats.add(resource_type)
+            self.totals.add(resource_type)
+            await route.abort('blockedbyclient')
+
+        async def check_type(route):
+            if route.request.resource_type in self.allowed_types:
+                await route.fallback()
+            else:
+                await abort(route)
+
+        # Routes added last are tried first: blocklist hits never reach check_type
+        if self.strict:
+            await context.route('**/*', check_type)
+        if self.pattern is not None:
+            await context.route(self.pattern, abort)
+        return stats
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "strict": self.strict,
+            "contexts": self.contexts,
+            **self.totals.as_dict(),
+        }
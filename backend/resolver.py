@@ -0,0 +1,113 @@
+"""
+Share link resolution
+
+App share links (api-shein.shein.com/h5/sharejump/appjump?link=...) point to
+a small page whose `var shareInfo` holds the cart's shareId. We turn that into
+the m.shein.com cart landing URL with one plain HTTP request and remember the
+mapping, since a share link always points to the same cart.
+"""
+
+import json
+import logging
+import re
+from typing import Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import httpx
+
+from cache import ResultCache
+
+
+logger = logging.getLogger(__name__)
+
+_SHARE_INFO_RE = re.compile(r'var\s+shareInfo\s*=\s*({[^;]+});')
+
+
+def is_share_url(url: str) -> bool:
+    return 'api-shein.shein.com' in url or 'sharejump' in url
+
+
+def share_key(url: str) -> Optional[str]:
+    """Cache key for a share link: its `link` token plus the country"""
+    try:
+        params = parse_qs(urlparse(url).query)
+    except ValueError:  # e.g. a broken IPv6 host
+        return None
+    link = params.get('link', [''])[0].strip()
+    if not link:
+        return None
+    country = params.get('localcountry', [''])[0].strip().upper()
+    return f"share:{link}:{country}"
+
+
+def landing_url_from_share_page(html: str, base_url: str = 'https://m.shein.com') -> Optional[str]:
+    """Build the cart landing URL from the `var shareInfo` of a sharejump page"""
+    match = _SHARE_INFO_RE.search(html)
+    if not match:
+        return None
+    try:
+        share_info = json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return None
+
+    share_id = share_info.get('shareId') or share_info.get('id')
+    if not share_id:
+        return None
+
+    local_country = share_info.get('localcountry', '')
+    country_code = local_country.lower() if local_country else ''
+    base_url = base_url.rstrip('/')
+    if country_code:
+        landing_url = f'{base_url}/{country_code}/cart/share/landing'
+    else:
+        landing_url = f'{base_url}/cart/share/landing'
+
+    params = {
+        'group_id': share_id,
+        'local_country': local_country,
+        'url_from': '',
+        'cart_share': share_info.get('cart_share', 1),
+    }
+    return f"{landing_url}?{urlencode(params)}"
+
+
+class ShareResolver:
+    """Resolves share links to cart landing URLs, with a persistent cache"""
+
+    def __init__(self, client: httpx.AsyncClient, cache: ResultCache, base_url: str = 'https://m.shein.com'):
+        self.client = client
+        self.cache = cache
+        self.base_url = base_url
+        self.fetches = 0
+
+    async def cached(self, url: str) -> Optional[str]:
+        """Landing URL for a share link resolved before, without fetching"""
+        key = share_key(url)
+        if key:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return cached.value
+        return None
+
+    async def resolve(self, url: str) -> Optional[str]:
+        """Landing URL for a share link, or None if it cannot be resolved"""
+        landing_url = await self.cached(url)
+        if landing_url:
+            return landing_url
+
+        key = share_key(url)
+        try:
+            self.fetches += 1
+            response = await self.client.get(url)
+            response.raise_for_status()
+        except (httpx.HTTPError, httpx.InvalidURL) as e:
+            logger.warning("Could not fetch share page: %s", e)
+            return None
+
+        landing_url = landing_url_from_share_page(response.text, self.base_url)
+        if landing_url and key:
+            await self.cache.set(key, landing_url)
+        return landing_url
+
+    def stats(self) -> dict:
+        return {"fetches": self.fetches, **self.cache.stats()}
@@ -0,0 +1,50 @@
+"""
+Single-flight deduplication of concurrent work
+
+When several requests ask for the same cart at the same time, only the first
+one starts a scrape; the others await the same future. Once it finishes the
+key is released, so later requests go through the cache or a new scrape.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run `fn()` once per key at a time.
+
+        Returns `(result, shared)` where `shared` is True when this caller
+        joined a call that was already in flight. A caller that is cancelled
+        (e.g. the client went away) does not cancel the shared call.
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future), True
+
+        future = asyncio.ensure_future(fn())
+        self._calls[key] = future
+        self.started += 1
+        future.add_done_callback(lambda f: self._release(key, f))
+        return await asyncio.shield(future), False
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
+
+    def _release(self, key: str, future: asyncio.Future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            # Mark the exception as retrieved even if every caller went away
+            future.exception()
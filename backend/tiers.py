@@ -0,0 +1,82 @@
+"""
+Tiered extraction
+
+Launching Chromium is the most expensive thing the backend does, so every
+scrape first tries a plain HTTP fetch of the cart page and parses the JSON
+state Shein embeds in it (the same approach as scrape_shein_cart.py). Only
+when that yields no items does the request escalate to the browser tier.
+"""
+
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from html_scan import find_embedded_state, loads
+
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+}
+
+# The embedded state the HTTP tier reads, in the order it is tried
+EMBEDDED_STATE_NAMES = ('__INITIAL_STATE__', 'gbRawData', 'cartData')
+
+
+class TierStats:
+    """Attempts and hits per extraction tier, for the stats endpoint"""
+
+    def __init__(self, *tiers: str):
+        self._counts = {tier: {"attempts": 0, "hits": 0} for tier in tiers}
+
+    def record(self, tier: str, hit: bool):
+        counts = self._counts.setdefault(tier, {"attempts": 0, "hits": 0})
+        counts["attempts"] += 1
+        if hit:
+            counts["hits"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            tier: {
+                **counts,
+                "hit_rate": round(counts["hits"] / counts["attempts"], 3) if counts["attempts"] else None,
+            }
+            for tier, counts in self._counts.items()
+        }
+
+
+def extract_embedded_items(html: str, parse: Callable[[Any], List], parser: Optional[str] = None) -> List:
+    """Parse cart items from JSON script tags and window.* state assignments"""
+    json_scripts, assignments = find_embedded_state(html, parser, names=EMBEDDED_STATE_NAMES)
+    for text in json_scripts + [text for _, text in assignments]:
+        try:
+            items = parse(loads(text))
+        except ValueError:
+            continue
+        if items:
+            return items
+
+    return []
+
+
+class HttpTier:
+    """Browser-free scrape: fetch the page over HTTP and read its embedded JSON"""
+
+    def __init__(self, client: httpx.AsyncClient, extract: Callable[[str], Awaitable[List]]):
+        self.client = client
+        # Page HTML -> items, async so large pages can be parsed in a worker
+        self.extract = extract
+
+    async def scrape(self, url: str) -> List:
+        try:
+            response = await self.client.get(url)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.info("HTTP tier fetch failed: %s", e)
+            return []
+
+        return await self.extract(response.text)
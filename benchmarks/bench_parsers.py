@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Offline parser benchmarks over the captured Shein pages
+
+Replays the fixtures checked into the repo root (debug_page.html,
+cart_landing.html, shein_page.html, cart_items.json) through every extraction
+strategy we ship and reports throughput, latency percentiles and peak memory,
+so parser regressions show up before deploy.
+
+None of the captured pages has a cart in its embedded state, so their rows
+only time scanning a page that has no cart. cart_state.html is built from
+cart_landing.html plus a cart in `window.__INITIAL_STATE__` (and as item
+markup for the DOM strategy). Every strategy must find all of its items
+before it is timed.
+
+Usage:
+    python benchmarks/bench_parsers.py
+    python benchmarks/bench_parsers.py --runs 50 --strategy http_tier
+    python benchmarks/bench_parsers.py --json bench_output.json
+
+The DOM strategy loads the fixtures into headless Chromium (network blocked)
+and is skipped when no browser is installed.
+"""
+
+import argparse
+import asyncio
+import functools
+import html as html_lib
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+# Importing the backend must not create cache files in the working directory
+os.environ.setdefault('RESOLVER_CACHE_PATH', '')
+os.environ.setdefault('CACHE_SQLITE_PATH', '')
+
+HTML_FIXTURES = ['debug_page.html', 'cart_landing.html', 'shein_page.html']
+CART_FIXTURE = 'cart_state.html'  # built by cart_state_page()
+JSON_FIXTURE = 'cart_items.json'
+
+
+def load_fixture(name: str) -> str:
+    with open(os.path.join(ROOT, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def cart_state_page(copies: int = 2):
+    """
+    (html, item count): cart_landing.html carrying a cart built from the
+    complete items of cart_items.json, with Shein's raw field names
+    """
+    complete = [item for item in json.loads(load_fixture(JSON_FIXTURE)) if {'name', 'price', 'image'} <= set(item)]
+    goods = [
+        {
+            'goods_id': str(100000 + index),
+            'goods_name': f"{item['name']} ({index + 1})",
+            'price': item['price'].split('\n')[0],
+            'goods_img': item['image'],
+            'quantity': 1 + index % 3,
+        }
+        for index, item in enumerate(complete * copies)
+    ]
+    state = json.dumps({'cart': {'goodsList': goods}}).replace('</', '<\\/')
+    rows = ''.join(
+        f'<div class="cart-item" data-goods-id="{item["goods_id"]}" style="min-height: 100px">'
+        f'<h3 class="goods-name">{html_lib.escape(item["goods_name"])}</h3>'
+        f'<span class="sale-price">{item["price"]}</span>'
+        f'<img class="goods-img" src="{item["goods_img"]}"></div>'
+        for item in goods
+    )
+    page = load_fixture('cart_landing.html').replace(
+        '</body>', f'{rows}<script>window.__INITIAL_STATE__ = {state};</script></body>', 1,
+    )
+    return page, len(goods)
+
+
+def load_html_fixtures():
+    """{name: html}, plus the cart fixture's item count"""
+    fixtures = {name: load_fixture(name) for name in HTML_FIXTURES}
+    fixtures[CART_FIXTURE], expected_items = cart_state_page()
+    return fixtures, expected_items
+
+
+def check_items(strategy: str, fixture: str, items, expected: int):
+    """Refuse to time a strategy that does not find the whole cart"""
+    found = len(items or [])
+    if found != expected:
+        raise SystemExit(f"{strategy} found {found} items in {fixture}, expected {expected}")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(strategy: str, fixture: str, size: int, timings: List[float], peak_bytes: int, items: int) -> Dict:
+    total = sum(timings)
+    return {
+        "strategy": strategy,
+        "fixture": fixture,
+        "runs": len(timings),
+        "items": items,
+        "ops_per_sec": round(len(timings) / total, 1) if total else None,
+        "mb_per_sec": round(size * len(timings) / total / 1e6, 1) if total else None,
+        "p50_ms": round(percentile(timings, 50) * 1000, 3),
+        "p95_ms": round(percentile(timings, 95) * 1000, 3),
+        "p99_ms": round(percentile(timings, 99) * 1000, 3),
+        "mean_ms": round(statistics.mean(timings) * 1000, 3),
+        "peak_mem_kb": round(peak_bytes / 1024, 1),
+    }
+
+
+def bench_sync(strategy: str, fixture: str, payload, size: int, fn: Callable, runs: int) -> Dict:
+    """Time `fn(payload)`; peak memory is measured on a separate traced run"""
+    fn(payload)  # warm-up (regex compilation, imports, caches)
+
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn(payload)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    fn(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return summarize(strategy, fixture, size, timings, peak, len(result or []))
+
+
+# --- strategies ------------------------------------------------------------
+
+def strategy_legacy_soup_regex():
+    """Reference: full html.parser tree + one lazy regex per variable over the page"""
+    import re
+    from bs4 import BeautifulSoup
+    from scrape_shein_cart import SheinCartScraper
+
+    scraper = SheinCartScraper(parser='html.parser')
+    patterns = [
+        r'window\.__INITIAL_STATE__\s*=\s*({.+?});',
+        r'window\.gbRawData\s*=\s*({.+?});',
+        r'cartData\s*=\s*({.+?});',
+        r'shareInfo\s*=\s*({.+?});',
+    ]
+
+    def run(html):
+        soup = BeautifulSoup(html, 'html.parser')
+        for script in soup.find_all('script', type='application/json'):
+            try:
+                items = scraper._parse_json_for_items(json.loads(script.string))
+            except (json.JSONDecodeError, TypeError):
+                continue
+            if items:
+                return items
+        for pattern in patterns:
+            match = re.search(pattern, html, re.DOTALL)
+            if match:
+                try:
+                    items = scraper._parse_json_for_items(json.loads(match.group(1)))
+                except json.JSONDecodeError:
+                    continue
+                if items:
+                    return items
+        return scraper._extract_from_html(soup)
+    return run
+
+
+def strategy_requests_scraper():
+    """SheinCartScraper._extract_items: script scan, DOM tree only as fallback"""
+    from scrape_shein_cart import SheinCartScraper
+    return SheinCartScraper()._extract_items
+
+
+def strategy_script_scan(parser: str):
+    """Backend parse-worker extraction (html_scan + cart search) with one script parser"""
+    import main as backend
+    from html_scan import available_parsers
+    from parse_pool import embedded_cart_candidates
+    from tiers import EMBEDDED_STATE_NAMES
+    if parser not in available_parsers():
+        return None
+    return functools.partial(
+        embedded_cart_candidates, parser=parser, names=EMBEDDED_STATE_NAMES, search=backend.CART_SEARCH,
+    )
+
+
+def strategy_browser_html_content():
+    """SheinCartScraperBrowser._extract_from_html_content: regex over raw HTML"""
+    try:
+        from scrape_shein_cart_browser import SheinCartScraperBrowser
+    except (ImportError, SystemExit):
+        return None
+    return SheinCartScraperBrowser()._extract_from_html_content
+
+
+def strategy_http_tier():
+    """Backend HTTP tier: embedded JSON extraction feeding parse_cart_data"""
+    import main as backend
+    from tiers import extract_embedded_items
+    return functools.partial(extract_embedded_items, parse=backend.parse_cart_data)
+
+
+def strategy_parse_cart_data():
+    """Backend parse_cart_data over decoded JS state"""
+    import main as backend
+    return backend.parse_cart_data
+
+
+HTML_STRATEGIES = {
+    'legacy_soup_regex': strategy_legacy_soup_regex,
+    'requests_scraper': strategy_requests_scraper,
+    **{
+        f'script_scan[{parser}]': functools.partial(strategy_script_scan, parser)
+        for parser in ('fast', 'selectolax', 'lxml', 'html.parser')
+    },
+    'browser_html_content': strategy_browser_html_content,
+    'http_tier': strategy_http_tier,
+}
+
+
+def run_html_strategies(selected: Optional[str], runs: int) -> List[Dict]:
+    results = []
+    fixtures, expected_items = load_html_fixtures()
+    for name, factory in HTML_STRATEGIES.items():
+        if selected and selected != name:
+            continue
+        fn = factory()
+        if fn is None:
+            print(f"skipping {name}: dependencies not installed", file=sys.stderr)
+            continue
+        check_items(name, CART_FIXTURE, fn(fixtures[CART_FIXTURE]), expected_items)
+        for fixture, html in fixtures.items():
+            results.append(bench_sync(name, fixture, html, len(html.encode()), fn, runs))
+    return results
+
+
+def run_parse_cart_data(selected: Optional[str], runs: int) -> List[Dict]:
+    if selected and selected != 'parse_cart_data':
+        return []
+    raw = load_fixture(JSON_FIXTURE)
+    items = json.loads(raw)
+    # Bury the list the way __NUXT__ does, so the recursive walk is exercised
+    state = {'fetch': {}, 'state': {'page': {'meta': {}}, 'cart': {'info': {'goodsList': items}}}}
+    fn = strategy_parse_cart_data()
+    return [bench_sync('parse_cart_data', JSON_FIXTURE, state, len(raw.encode()), fn, runs)]
+
+
+# --- DOM extraction in a real browser ---------------------------------------
+
+async def run_dom_strategy(selected: Optional[str], runs: int) -> List[Dict]:
+    if selected and selected != 'dom_extract':
+        return []
+    try:
+        from playwright.async_api import async_playwright
+    except ImportError:
+        print("skipping dom_extract: playwright not installed", file=sys.stderr)
+        return []
+    import main as backend
+
+    fixtures, expected_items = load_html_fixtures()
+    results = []
+    async with async_playwright() as p:
+        try:
+            browser = await p.chromium.launch(headless=True)
+        except Exception as e:
+            print(f"skipping dom_extract: {str(e).splitlines()[0]}", file=sys.stderr)
+            return []
+        page = await browser.new_page()
+        # Scripts would rewrite the DOM and hit the network; parse static markup only
+        await page.route("**/*", lambda route: route.abort())
+        for fixture, html in fixtures.items():
+            await page.set_content(html, wait_until='domcontentloaded')
+            items = await backend.extract_from_dom(page)  # warm-up
+            if fixture == CART_FIXTURE:
+                check_items('dom_extract', fixture, items, expected_items)
+            timings = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                items = await backend.extract_from_dom(page)
+                timings.append(time.perf_counter() - started)
+            # Peak memory of the Python side only; the work happens in Chromium
+            tracemalloc.start()
+            await backend.extract_from_dom(page)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results.append(summarize('dom_extract', fixture, len(html.encode()), timings, peak, len(items)))
+        await browser.close()
+    return results
+
+
+def print_table(results: List[Dict]):
+    columns = ['strategy', 'fixture', 'runs', 'items', 'ops_per_sec', 'mb_per_sec',
+               'p50_ms', 'p95_ms', 'p99_ms', 'peak_mem_kb']
+    widths = {c: max(len(c), *(len(str(r[c])) for r in results)) for c in columns}
+    print('  '.join(c.ljust(widths[c]) for c in columns))
+    for r in results:
+        print('  '.join(str(r[c]).ljust(widths[c]) for c in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=20, help='timed runs per strategy and fixture')
+    parser.add_argument('--strategy', help='only run this strategy')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    # Set up before the backend is imported (which then keeps this setup), so
+    # only warnings are logged and they go to stderr, not into the results
+    import logs
+    logs.setup_logging('WARNING', 'text', output=sys.stderr)
+
+    results = run_html_strategies(args.strategy, args.runs)
+    results += run_parse_cart_data(args.strategy, args.runs)
+    results += asyncio.run(run_dom_strategy(args.strategy, args.runs))
+
+    if not results:
+        print("No strategies ran")
+        return 1
+
+    print_table(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+Locust load test for the scraper backend against the local replay server
+
+    python loadtest/replay_server.py --port 9000 --latency-ms 150 &
+    SHEIN_BASE_URL=http://127.0.0.1:9000 uvicorn main:app --port 8000   # from backend/
+    locust -f loadtest/locustfile.py --host http://127.0.0.1:8000
+
+REPLAY_URL sets where the share links point (default http://127.0.0.1:9000)
+and HOT_CARTS how many distinct carts the "shared" traffic is spread over.
+"""
+
+import os
+import random
+import uuid
+
+from locust import HttpUser, between, task
+
+from replay_server import share_url
+
+REPLAY_URL = os.getenv('REPLAY_URL', 'http://127.0.0.1:9000')
+HOT_CARTS = int(os.getenv('HOT_CARTS', '5'))
+
+
+class ScrapeUser(HttpUser):
+    wait_time = between(0.5, 2)
+
+    @task(5)
+    def scrape_shared_cart(self):
+        """Several users re-submitting the same few carts (cache + coalescing)"""
+        link = f"hot{random.randrange(HOT_CARTS)}"
+        self.client.post('/scrape', json={'url': share_url(REPLAY_URL, link)}, name='/scrape [hot]')
+
+    @task(2)
+    def scrape_new_cart(self):
+        """A cart nobody has scraped yet: always reaches a scraper tier"""
+        link = uuid.uuid4().hex[:12]
+        self.client.post('/scrape', json={'url': share_url(REPLAY_URL, link)}, name='/scrape [cold]')
+
+    @task(1)
+    def scrape_job(self):
+        link = uuid.uuid4().hex[:12]
+        response = self.client.post('/scrape/jobs', json={'url': share_url(REPLAY_URL, link)})
+        if response.status_code == 202:
+            job_id = response.json()['job_id']
+            self.client.get(f'/scrape/jobs/{job_id}', name='/scrape/jobs/[id]')
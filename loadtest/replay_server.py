@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Shein, built from the recorded fixtures
+
+Serves the three things the scraper pipeline talks to:
+
+    GET /h5/sharejump/appjump?link=...&localcountry=ZA   share page (var shareInfo)
+    GET /{country}/cart/share/landing?group_id=...         cart landing page
+    GET /bff-api/cart/share/landing_info?group_id=...      cart JSON (cart_items.json)
+
+The landing page is cart_landing.html with Shein's own scripts stripped (so
+nothing reaches the real site) and a small script that fetches the cart JSON
+and renders `.cart-item` rows, which exercises network capture and DOM
+extraction. `--cart-source embedded` instead inlines the cart as
+window.__INITIAL_STATE__ so the HTTP tier finds it without a browser.
+
+Latency and failures can be injected to test timeouts and retries:
+
+    python loadtest/replay_server.py --port 9000 --latency-ms 150 --jitter-ms 50 --failure-rate 0.05
+
+Point the backend at it with SHEIN_BASE_URL=http://127.0.0.1:9000 and submit
+share links like http://127.0.0.1:9000/h5/sharejump/appjump?link=abc&localcountry=ZA
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+from urllib.parse import quote
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ReplayConfig:
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, failure_rate=0.0, failure_status=503, cart_source='api'):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.cart_source = cart_source
+
+
+def _read(name: str) -> str:
+    with open(os.path.join(ROOT, name), encoding='utf-8') as f:
+        return f.read()
+
+
+_SCRIPT_RE = re.compile(r'<script\b[^>]*>.*?</script>', re.DOTALL | re.IGNORECASE)
+_SHARE_INFO_RE = re.compile(r'var\s+shareInfo\s*=\s*({[^;]+});')
+
+_RENDER_JS = '''<script>
+fetch('/bff-api/cart/share/landing_info?group_id=' + encodeURIComponent(%s))
+  .then(function (r) { return r.json(); })
+  .then(function (data) {
+    var list = document.createElement('div');
+    data.info.goodsList.forEach(function (item) {
+      var row = document.createElement('div');
+      row.className = 'cart-item';
+      row.style.minHeight = '120px';
+      row.innerHTML = '<h3 class="goods-name"></h3><span class="sale-price"></span><img class="goods-img">';
+      row.querySelector('.goods-name').textContent = item.name || '';
+      row.querySelector('.sale-price').textContent = item.price || '';
+      if (item.image) row.querySelector('.goods-img').setAttribute('src', item.image);
+      list.appendChild(row);
+    });
+    document.body.prepend(list);
+  });
+</script>'''
+
+
+def create_app(config: ReplayConfig) -> FastAPI:
+    app = FastAPI(title="Shein replay server")
+
+    share_page = _read('shein_page.html')
+    landing_page = _SCRIPT_RE.sub('', _read('cart_landing.html'))
+    cart_items = json.loads(_read('cart_items.json'))
+    stats = {"requests": 0, "failures": 0}
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        stats["requests"] += 1
+        delay = config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if request.url.path != '/_stats' and random.random() < config.failure_rate:
+            stats["failures"] += 1
+            return Response(status_code=config.failure_status, content="injected failure")
+        return await call_next(request)
+
+    @app.get("/h5/sharejump/appjump", response_class=HTMLResponse)
+    async def sharejump(link: str = "replay", localcountry: str = "ZA"):
+        # Every link token maps to its own cart so caches see distinct carts
+        share_info = json.loads(_SHARE_INFO_RE.search(share_page).group(1))
+        share_info.update({
+            "shareId": link,
+            "id": link,
+            "localcountry": localcountry,
+        })
+        return _SHARE_INFO_RE.sub(lambda _: f"var shareInfo = {json.dumps(share_info)};", share_page, count=1)
+
+    @app.get("/{country}/cart/share/landing", response_class=HTMLResponse)
+    @app.get("/cart/share/landing", response_class=HTMLResponse)
+    async def landing(group_id: str = "", country: str = ""):
+        if config.cart_source == 'embedded':
+            state = json.dumps({"cart": {"goodsList": cart_items}}).replace('</', '<\\/')
+            script = f"<script>window.__INITIAL_STATE__ = {state};</script>"
+        else:
+            script = _RENDER_JS % json.dumps(group_id).replace('</', '<\\/')
+        return landing_page.replace('</body>', script + '</body>', 1)
+
+    @app.get("/bff-api/cart/share/landing_info")
+    async def landing_info(group_id: str = ""):
+        return JSONResponse({"code": "0", "msg": "ok", "info": {"groupId": group_id, "goodsList": cart_items}})
+
+    @app.get("/_stats")
+    async def replay_stats():
+        return stats
+
+    return app
+
+
+def share_url(base_url: str, link: str, country: str = "ZA") -> str:
+    """Share link on the replay server, for load-test scripts"""
+    return f"{base_url.rstrip('/')}/h5/sharejump/appjump?link={quote(link)}&localcountry={country}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded Shein fixtures for load tests")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--latency-ms', type=float, default=float(os.getenv('REPLAY_LATENCY_MS', 0)))
+    parser.add_argument('--jitter-ms', type=float, default=float(os.getenv('REPLAY_JITTER_MS', 0)))
+    parser.add_argument('--failure-rate', type=float, default=float(os.getenv('REPLAY_FAILURE_RATE', 0)))
+    parser.add_argument('--failure-status', type=int, default=int(os.getenv('REPLAY_FAILURE_STATUS', 503)))
+    parser.add_argument('--cart-source', choices=['api', 'embedded'], default=os.getenv('REPLAY_CART_SOURCE', 'api'))
+    args = parser.parse_args()
+
+    import uvicorn
+    config = ReplayConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+        failure_status=args.failure_status,
+        cart_source=args.cart_source,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == '__main__':
+    main()
@@ -12,7 +12,7 @@ import {
   Platform,
 } from 'react-native';
 import { Colors, Spacing, BorderRadius, Typography } from '../theme/colors';
-import { CartItem } from '../types/cart';
+import { CartItem, CartTotals } from '../types/cart';
 import { supabase } from '../config/supabase';
 import { orderService } from '../services/orderService';
 import { currencyService } from '../services/currencyService';
@@ -29,6 +29,7 @@ interface DeliveryAddress {
 interface OrderReviewModalProps {
   visible: boolean;
   items: CartItem[];
+  totals?: CartTotals;
   cartUrl: string;
   deliveryAddress: DeliveryAddress;
   onClose: () => void;
@@ -38,6 +39,7 @@ interface OrderReviewModalProps {
 export default function OrderReviewModal({
   visible,
   items,
+  totals,
   cartUrl,
   deliveryAddress,
   onClose,
@@ -60,7 +62,7 @@ export default function OrderReviewModal({
     loadDeliveryFee();
     loadPaymentNumbers();
     calculateSubtotal();
-  }, [items]);
+  }, [items, totals]);
 
   const loadServiceFee = async () => {
     try {
@@ -116,6 +118,12 @@ export default function OrderReviewModal({
   };
 
   const calculateSubtotal = () => {
+    // The backend sends the cart subtotal ready-made; only sum items without it.
+    // Items it could not price are not in it, see the warning below
+    if (totals?.subtotal?.USD !== undefined) {
+      setSubtotal(totals.subtotal.USD);
+      return;
+    }
     let total = 0;
     items.forEach(item => {
       // Extract numeric value from price string (e.g., "R148" -> 148)
@@ -141,6 +149,11 @@ export default function OrderReviewModal({
     return subtotal + calculateServiceFee() + deliveryFee;
   };
 
+  // Same rate table as the subtotal when the backend sent one
+  const usdToCdfRate = totals?.rates_base === 'USD' && totals.rates.CDF
+    ? totals.rates.CDF
+    : currencyService.usdToCdf(1);
+
   const handlePlaceOrder = async () => {
     if (!deliveryAddress) {
       if (Platform.OS !== 'web') {
@@ -285,6 +298,13 @@ export default function OrderReviewModal({
                   {getCurrency()}{subtotal.toFixed(2)}
                 </Text>
               </View>
+              {totals !== undefined && totals.unpriced_items > 0 && (
+                <Text style={styles.unpricedWarning}>
+                  {totals.unpriced_items === 1
+                    ? '⚠️ 1 item has no readable price and is not included in the subtotal.'
+                    : `⚠️ ${totals.unpriced_items} items have no readable price and are not included in the subtotal.`}
+                </Text>
+              )}
               <View style={styles.summaryRow}>
                 <Text style={styles.summaryLabel}>
                   Service Fee ({serviceFeePercentage}%):
@@ -310,10 +330,11 @@ export default function OrderReviewModal({
               <View style={styles.conversionBox}>
                 <Text style={styles.conversionTitle}>💱 Amount in Congolese Francs:</Text>
                 <Text style={styles.conversionText}>
-                  ${calculateTotal().toFixed(2)} USD ≈ {(calculateTotal() * 2500).toLocaleString('fr-CD')} CDF
+                  ${calculateTotal().toFixed(2)} USD ≈ {Math.round(calculateTotal() * usdToCdfRate).toLocaleString('fr-CD')} CDF
                 </Text>
                 <Text style={styles.conversionNote}>
-                  *Approximate rate: 1 USD = 2,500 CDF
+                  *Approximate rate: 1 USD = {usdToCdfRate.toLocaleString('en-US')} CDF
+                  {totals?.rates_updated ? ` (${totals.rates_updated})` : ''}
                 </Text>
               </View>
             </View>
@@ -571,6 +592,12 @@ const styles = StyleSheet.create({
     fontStyle: 'italic',
     fontFamily: Typography.fontFamily.regular,
   },
+  unpricedWarning: {
+    fontSize: 12,
+    color: Colors.warning,
+    marginBottom: Spacing.sm,
+    fontFamily: Typography.fontFamily.regular,
+  },
   notesInput: {
     borderWidth: 1,
     borderColor: Colors.border,
@@ -13,13 +13,14 @@ import {
   ScrollView,
   KeyboardAvoidingView,
 } from 'react-native';
-import { CartItem } from '../types/cart';
+import { CartItem, CartTotals } from '../types/cart';
 import CartItemCard from '../components/CartItemCard';
 import SizeSelectionModal from '../components/SizeSelectionModal';
 import DeliveryAddressModal from '../components/DeliveryAddressModal';
 import OrderReviewModal from '../components/OrderReviewModal';
 import Header from '../components/Header';
 import { scrapeCart } from '../services/api';
+import { currencyService } from '../services/currencyService';
 import { Colors, Spacing, BorderRadius, Typography } from '../theme/colors';
 
 interface DeliveryAddress {
@@ -35,6 +36,7 @@ export default function CartScraperScreen() {
   const [url, setUrl] = useState('');
   const [loading, setLoading] = useState(false);
   const [cartItems, setCartItems] = useState<CartItem[]>([]);
+  const [cartTotals, setCartTotals] = useState<CartTotals | undefined>(undefined);
   const [showSizeModal, setShowSizeModal] = useState(false);
   const [showAddressModal, setShowAddressModal] = useState(false);
   const [showReviewModal, setShowReviewModal] = useState(false);
@@ -54,6 +56,7 @@ export default function CartScraperScreen() {
       
       if (response.success && response.items.length > 0) {
         setCartItems(response.items);
+        setCartTotals(response.totals);
         if (Platform.OS !== 'web') {
           Alert.alert('Success', `Found ${response.items.length} items!`);
         }
@@ -78,6 +81,8 @@ export default function CartScraperScreen() {
 
   const handleSizeConfirm = (itemsWithSizes: CartItem[]) => {
     setCartItems(itemsWithSizes);
+    // Keep the backend totals in step with the edited items
+    setCartTotals(totals => totals && currencyService.recomputeTotals(itemsWithSizes, totals));
     setShowSizeModal(false);
     // Open address selection modal
     setShowAddressModal(true);
@@ -93,6 +98,7 @@ export default function CartScraperScreen() {
   const handleOrderPlaced = () => {
     // Clear cart and reset state
     setCartItems([]);
+    setCartTotals(undefined);
     setUrl('');
     setSelectedAddress(null);
     setShowReviewModal(false);
@@ -153,9 +159,18 @@ export default function CartScraperScreen() {
       {cartItems.length > 0 && (
         <View style={styles.resultsContainer}>
           <View style={styles.resultsHeader}>
-            <Text style={styles.resultsTitle}>
-              Found {cartItems.length} items
-            </Text>
+            <View>
+              <Text style={styles.resultsTitle}>
+                Found {cartItems.length} items
+              </Text>
+              {cartTotals?.subtotal?.USD !== undefined && (
+                <Text style={styles.resultsSubtotal}>
+                  {cartTotals.subtotal.ZAR !== undefined ? `R${cartTotals.subtotal.ZAR.toFixed(2)} ≈ ` : ''}
+                  ${cartTotals.subtotal.USD.toFixed(2)} USD
+                  {cartTotals.unpriced_items > 0 ? ` + ${cartTotals.unpriced_items} unpriced` : ''}
+                </Text>
+              )}
+            </View>
             <TouchableOpacity
               style={styles.placeOrderButton}
               onPress={handlePlaceOrder}
@@ -187,6 +202,7 @@ export default function CartScraperScreen() {
         <OrderReviewModal
           visible={showReviewModal}
           items={cartItems}
+          totals={cartTotals}
           cartUrl={url}
           deliveryAddress={selectedAddress}
           onClose={() => setShowReviewModal(false)}
@@ -312,6 +328,12 @@ const styles = StyleSheet.create({
     color: Colors.text.primary,
     fontFamily: Typography.fontFamily.semiBold,
   },
+  resultsSubtotal: {
+    fontSize: 14,
+    color: Colors.text.secondary,
+    fontFamily: Typography.fontFamily.medium,
+    marginTop: 2,
+  },
   placeOrderButton: {
     backgroundColor: Colors.primary,
     paddingVertical: Spacing.sm,
@@ -1,10 +1,13 @@
-import { CartItem } from '../types/cart';
+import { CartItem, CartTotals } from '../types/cart';
 
 export interface ScrapeResponse {
   success: boolean;
   items: CartItem[];
   total_items: number;
+  totals?: CartTotals;
   message?: string;
+  cache_hit?: boolean;
+  cache_age?: number;
 }
 
 // Use environment variable for API URL, fallback to localhost for development
@@ -1,5 +1,6 @@
 // Currency conversion service for Lobi
 // Using hardcoded rates for now - can be replaced with real-time API later
+import { CartItem, CartTotals } from '../types/cart';
 
 export interface ExchangeRates {
   ZAR_to_USD: number;
@@ -57,6 +58,53 @@ export const currencyService = {
     return `R${zarAmount.toFixed(2)} ≈ $${usd.toFixed(2)} USD ≈ ${cdf.toLocaleString('fr-CD')} CDF`;
   },
 
+  /**
+   * Recompute backend cart totals after items were edited on the device,
+   * using the rates that came with them
+   */
+  recomputeTotals(items: CartItem[], totals: CartTotals): CartTotals {
+    const sale: Record<string, number> = {};
+    const original: Record<string, number> = {};
+    let priced = 0;
+    items.forEach(item => {
+      if (item.price_value === undefined || !item.currency || !totals.rates[item.currency]) {
+        return;
+      }
+      const parsed = typeof item.quantity === 'string' ? parseInt(item.quantity, 10) : item.quantity;
+      const quantity = parsed === undefined || isNaN(parsed) ? 1 : parsed;
+      sale[item.currency] = (sale[item.currency] || 0) + item.price_value * quantity;
+      original[item.currency] = (original[item.currency] || 0)
+        + (item.original_price_value ?? item.price_value) * quantity;
+      priced += 1;
+    });
+
+    // The backend's total currencies; it sends no subtotal for a cart without prices
+    const targets = Object.keys(totals.subtotal ?? totals.original_subtotal ?? totals.rates);
+    const convert = (sums: Record<string, number>) => {
+      if (priced === 0) {
+        return undefined;
+      }
+      const converted: Record<string, number> = {};
+      targets.forEach(target => {
+        const total = Object.keys(sums).reduce(
+          (sum, source) => sum + sums[source] / totals.rates[source] * totals.rates[target],
+          0,
+        );
+        converted[target] = Math.round(total * 100) / 100;
+      });
+      return converted;
+    };
+
+    return {
+      ...totals,
+      subtotal: convert(sale),
+      original_subtotal: convert(original),
+      source_currencies: Object.keys(sale).sort(),
+      priced_items: priced,
+      unpriced_items: items.length - priced,
+    };
+  },
+
   /**
    * Extract numeric value from price string (e.g., "R148" -> 148)
    */
@@ -1,16 +1,34 @@
 export interface CartItem {
   name?: string;
   price?: string;
-  quantity?: string;
+  price_value?: number;
+  original_price_value?: number;
+  currency?: string;
+  quantity?: number | string;
   image?: string;
   sku?: string;
   color?: string;
   size?: string;
 }
 
+// Cart subtotals computed by the backend, keyed by ISO currency code.
+// The subtotals are missing when no item has a price, and leave out the
+// unpriced_items when some do.
+export interface CartTotals {
+  subtotal?: Record<string, number>;
+  original_subtotal?: Record<string, number>;
+  source_currencies: string[];
+  priced_items: number;
+  unpriced_items: number;
+  rates: Record<string, number>; // units per 1 rates_base
+  rates_base: string;
+  rates_updated?: string;
+}
+
 export interface ScrapeResponse {
   success: boolean;
   items: CartItem[];
   total_items: number;
+  totals?: CartTotals;
   message?: string;
 }
@@ -7,25 +7,57 @@ This script scrapes items from a public Shein cart URL and returns the cart item
 import sys
 import json
 import re
-import requests
+import httpx
 from bs4 import BeautifulSoup
 from typing import List, Dict, Optional
 from urllib.parse import urlencode
 
+# The backend modules imported by the root scripts must not import other
+# backend modules: the scripts run from the repo root, not from backend/
+from backend.cart_search import DEFAULT_CART_PATHS, find_cart_items, parse_paths
+from backend.html_scan import available_parsers, find_embedded_state, loads, resolve_parser
+from backend.http_client import HTTP2_AVAILABLE
+from backend.item_schema import ItemSchema
+
+CART_PATHS = parse_paths(DEFAULT_CART_PATHS)
+# Like before the shared schema, this scraper only keeps items with a name
+ITEM_SCHEMA = ItemSchema(required=('name',))
+
+_client: Optional[httpx.Client] = None
+
+
+def shared_client() -> httpx.Client:
+    """Keep-alive client shared by every scraper in this process"""
+    global _client
+    if _client is None:
+        _client = httpx.Client(http2=HTTP2_AVAILABLE, timeout=10, follow_redirects=True)
+    return _client
+
 
 class SheinCartScraper:
     """Scraper for Shein public cart URLs"""
     
-    def __init__(self):
+    def __init__(self, parser: Optional[str] = None, client: Optional[httpx.Client] = None):
+        # Parser for the <script> scan (see backend/html_scan.py); the DOM
+        # fallback uses lxml through BeautifulSoup when it is installed
+        self.parser = resolve_parser(parser)
+        if self.parser != 'html.parser' and 'lxml' in available_parsers():
+            self.soup_builder = 'lxml'
+        else:
+            self.soup_builder = 'html.parser'
+        self._client = client
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         }
     
+    @property
+    def client(self) -> httpx.Client:
+        # Reusing connections saves a TLS handshake per request
+        return self._client or shared_client()
+    
     def scrape_cart(self, url: str) -> List[Dict[str, any]]:
         """
         Scrape items from a Shein cart URL
@@ -51,19 +83,15 @@ class SheinCartScraper:
                 print(f"Cart landing URL: {url}")
             
             # Make request
-            session = requests.Session()
-            response = session.get(url, headers=self.headers, timeout=10, allow_redirects=True)
+            response = self.client.get(url, headers=self.headers)
             response.raise_for_status()
             
-            # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
             # Extract cart items
-            items = self._extract_items(soup, response.text)
+            items = self._extract_items(response.text)
             
             return items
             
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             print(f"Error fetching URL: {e}", file=sys.stderr)
             return []
         except Exception as e:
@@ -82,11 +110,19 @@ class SheinCartScraper:
         """
         try:
             # Fetch the share page
-            response = requests.get(share_url, headers=self.headers, timeout=10)
+            response = self.client.get(share_url, headers=self.headers)
             response.raise_for_status()
+            return self._landing_url_from_share_page(response.text)
+        except Exception as e:
+            print(f"Error converting share URL: {e}")
             
+        return None
+    
+    def _landing_url_from_share_page(self, html: str) -> Optional[str]:
+        """Build the cart landing URL from the `var shareInfo` of a share page"""
+        try:
             # Look for shareInfo in JavaScript
-            match = re.search(r'var\s+shareInfo\s*=\s*({[^;]+});', response.text)
+            match = re.search(r'var\s+shareInfo\s*=\s*({[^;]+});', html)
             if match:
                 share_info_str = match.group(1)
                 share_info = json.loads(share_info_str)
@@ -114,151 +150,59 @@ class SheinCartScraper:
                     return cart_url
                     
         except Exception as e:
-            print(f"Error converting share URL: {e}")
+            print(f"Error reading shareInfo: {e}")
             
         return None
     
-    def _extract_items(self, soup: BeautifulSoup, html_text: str) -> List[Dict[str, any]]:
+    def _extract_items(self, html_text: str) -> List[Dict[str, any]]:
         """
-        Extract cart items from parsed HTML
+        Extract cart items from the page HTML
         
         This method tries multiple strategies to find cart items:
         1. Look for JSON data in script tags
         2. Parse HTML elements for product cards
+        
+        The document tree is only built when the script scan finds nothing.
         """
         items = []
         
         # Strategy 1: Try to find JSON data in script tags
-        items = self._extract_from_json(soup, html_text)
+        items = self._extract_from_json(html_text)
         
         # Strategy 2: If no items found, try parsing HTML elements
         if not items:
+            soup = BeautifulSoup(html_text, self.soup_builder)
             items = self._extract_from_html(soup)
         
         return items
     
-    def _extract_from_json(self, soup: BeautifulSoup, html_text: str) -> List[Dict[str, any]]:
-        """Extract items from JSON data embedded in the page"""
-        items = []
-        
-        # Look for script tags containing cart data
-        script_tags = soup.find_all('script', type='application/json')
+    def _extract_from_json(self, html_text: str) -> List[Dict[str, any]]:
+        """Extract items from JSON data embedded in the page's scripts"""
+        # JSON script tags first, then window.__INITIAL_STATE__, gbRawData,
+        # cartData and shareInfo assignments, all found in one scan
+        json_scripts, assignments = find_embedded_state(html_text, self.parser)
+        candidates = json_scripts + [text for _, text in assignments]
         
-        for script in script_tags:
+        for text in candidates:
             try:
-                data = json.loads(script.string)
-                # Try to find cart items in the JSON structure
-                items = self._parse_json_for_items(data)
-                if items:
-                    break
-            except (json.JSONDecodeError, AttributeError):
+                data = loads(text)
+            except ValueError:
                 continue
+            items = self._parse_json_for_items(data)
+            if items:
+                return items
         
-        # Also try to find window.__INITIAL_STATE__ or similar patterns
-        if not items:
-            patterns = [
-                r'window\.__INITIAL_STATE__\s*=\s*({.+?});',
-                r'window\.gbRawData\s*=\s*({.+?});',
-                r'cartData\s*=\s*({.+?});',
-                r'shareInfo\s*=\s*({.+?});'
-            ]
-            
-            for pattern in patterns:
-                matches = re.search(pattern, html_text, re.DOTALL)
-                if matches:
-                    try:
-                        data = json.loads(matches.group(1))
-                        items = self._parse_json_for_items(data)
-                        if items:
-                            break
-                    except json.JSONDecodeError:
-                        continue
-        
-        return items
+        return []
     
     def _parse_json_for_items(self, data: dict) -> List[Dict[str, any]]:
-        """Recursively search for cart items in JSON structure"""
-        items = []
-        
+        """Search for cart items in JSON structure: known paths, then a bounded walk"""
         # Common keys that might contain cart items
         cart_keys = ['cart', 'cartItems', 'items', 'products', 'goods', 'cartGoods', 'productList', 'goodsList']
-        
-        if isinstance(data, dict):
-            for key in cart_keys:
-                if key in data and isinstance(data[key], list):
-                    for item in data[key]:
-                        if isinstance(item, dict):
-                            parsed_item = self._parse_item(item)
-                            if parsed_item:
-                                items.append(parsed_item)
-            
-            # Recursively search nested dictionaries
-            if not items:
-                for value in data.values():
-                    if isinstance(value, (dict, list)):
-                        nested_items = self._parse_json_for_items(value)
-                        items.extend(nested_items)
-                        if items:
-                            break
-        
-        elif isinstance(data, list):
-            for item in data:
-                if isinstance(item, dict):
-                    parsed_item = self._parse_item(item)
-                    if parsed_item:
-                        items.append(parsed_item)
-        
-        return items
+        return find_cart_items(data, self._parse_item_list, keys=cart_keys, paths=CART_PATHS)
     
-    def _parse_item(self, item: dict) -> Optional[Dict[str, any]]:
-        """Parse a single item from JSON data"""
-        # Extract common product fields
-        product_info = {}
-        
-        # Product name/title
-        for key in ['name', 'title', 'productName', 'goodsName', 'goods_name', 'goods_title']:
-            if key in item:
-                product_info['name'] = item[key]
-                break
-        
-        # Price
-        for key in ['price', 'salePrice', 'retailPrice', 'amount', 'unit_price', 'goods_price']:
-            if key in item:
-                product_info['price'] = item[key]
-                break
-        
-        # Quantity
-        for key in ['quantity', 'qty', 'num', 'amount', 'goods_num']:
-            if key in item:
-                product_info['quantity'] = item[key]
-                break
-        
-        # Image
-        for key in ['image', 'img', 'thumbnail', 'pic', 'goodsImg', 'goods_img', 'goods_image']:
-            if key in item:
-                product_info['image'] = item[key]
-                break
-        
-        # SKU/Product ID
-        for key in ['sku', 'id', 'productId', 'goodsId', 'goods_id', 'goods_sn']:
-            if key in item:
-                product_info['sku'] = item[key]
-                break
-        
-        # Color/Size
-        if 'color' in item:
-            product_info['color'] = item['color']
-        if 'size' in item:
-            product_info['size'] = item['size']
-        
-        # Attributes
-        for key in ['attr', 'attributes', 'sku_info', 'skuInfo']:
-            if key in item and isinstance(item[key], (dict, list)):
-                product_info['attributes'] = item[key]
-                break
-        
-        # Only return if we found at least a name
-        return product_info if 'name' in product_info else None
+    def _parse_item_list(self, values: list) -> List[Dict[str, any]]:
+        """Normalize the dicts of a candidate cart list (backend/item_schema.py)"""
+        return ITEM_SCHEMA.normalize_list(values)
     
     def _extract_from_html(self, soup: BeautifulSoup) -> List[Dict[str, any]]:
         """Extract items by parsing HTML elements"""
@@ -6,26 +6,44 @@ Uses Playwright to handle JavaScript-rendered content
 
 import sys
 import json
-import re
 import asyncio
 from typing import List, Dict, Optional
-from urllib.parse import urlencode
 
 try:
-    from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
+    from playwright.async_api import async_playwright
 except ImportError:
     print("Error: playwright not installed")
     print("Install it with: pip install playwright")
     print("Then run: playwright install chromium")
     sys.exit(1)
 
+from backend.cart_search import DEFAULT_CART_PATHS, fetch_cart_candidates, find_cart_items, parse_paths
+from backend.diagnostics import DiagnosticsStore
+from backend.html_scan import find_embedded_state, loads
+from backend.http_client import create_async_client
+from backend.item_schema import ItemSchema
+from backend.readiness import CartReadiness
+from backend.request_filter import RequestFilter
+from scrape_shein_cart import SheinCartScraper
+
+CART_KEYS = ['cart', 'cartItems', 'items', 'products', 'goods', 'cartGoods', 'productList', 'goodsList', 'cartInfo']
+CART_PATHS = parse_paths(DEFAULT_CART_PATHS)
+ITEM_SCHEMA = ItemSchema()
+NAME_KEYS = list(ITEM_SCHEMA.aliases['name'])
+JS_GLOBALS = [('__NUXT__', '__NUXT__'), ('__INITIAL_STATE__', '__INITIAL_STATE__'), ('cartData', 'cartData'), ('gbRawData', 'gbRawData')]
+
 
 class SheinCartScraperBrowser:
     """Scraper for Shein public cart URLs using browser automation"""
     
-    def __init__(self, headless=True):
+    def __init__(self, headless=True, diagnostics: Optional[DiagnosticsStore] = None):
         self.timeout = 60000  # 60 seconds
+        self.ready_timeout = 10  # seconds to wait for cart data after load
         self.headless = headless
+        self.request_filter = RequestFilter()
+        # Failure captures are off unless a store is passed in
+        self.diagnostics = diagnostics or DiagnosticsStore(enabled=False)
+        self.http_client = None  # pooled async client, created on first use
     
     async def scrape_cart(self, url: str) -> List[Dict[str, any]]:
         """
@@ -64,6 +82,9 @@ class SheinCartScraperBrowser:
                 timezone_id='Africa/Johannesburg'
             )
             
+            # Skip images, styles, fonts and trackers; the cart needs none of them
+            filter_stats = await self.request_filter.install(context)
+            
             # Add extra stealth measures
             await context.add_init_script("""
                 // Override the navigator.webdriver property
@@ -96,6 +117,7 @@ class SheinCartScraperBrowser:
             """)
             
             page = await context.new_page()
+            readiness = CartReadiness(page)
             
             try:
                 print(f"Loading page: {url}")
@@ -108,30 +130,19 @@ class SheinCartScraperBrowser:
                     # Try with no wait_until
                     await page.goto(url, timeout=self.timeout)
                 
-                # Wait for cart content to load with human-like delays
+                # Wait until the cart data is there (or give up at the deadline)
                 print("Waiting for cart data to load...")
-                await asyncio.sleep(3)  # Initial wait
+                signal = await readiness.wait(timeout=self.ready_timeout)
+                print(f"Page ready ({signal})")
                 
                 # Simulate human behavior - scroll and move mouse
                 print("Simulating human behavior...")
                 await page.mouse.move(100, 100)
-                await asyncio.sleep(0.5)
                 await page.mouse.move(200, 300)
-                await asyncio.sleep(0.5)
                 
-                # Scroll down slowly
+                # Scroll down to trigger any lazy-loaded cart rows
                 for i in range(3):
                     await page.evaluate('window.scrollBy(0, 300)')
-                    await asyncio.sleep(0.7)
-                
-                # Wait a bit more for any dynamic content
-                await asyncio.sleep(3)
-                
-                # Optionally wait for specific elements
-                try:
-                    await page.wait_for_selector('body', timeout=5000)
-                except PlaywrightTimeout:
-                    print("Warning: Timeout waiting for body, proceeding anyway...")
                 
                 # Extract cart items
                 items = await self._extract_items_from_page(page)
@@ -142,90 +153,75 @@ class SheinCartScraperBrowser:
                     # Look for any JSON data in the page
                     items = self._extract_from_html_content(content)
                 
+                if not items:
+                    path = await self.diagnostics.capture(page, 'browser', reason='no_items', signal=signal)
+                    if path:
+                        print(f"Saved diagnostic capture to {path}")
+                
                 return items
                 
             except Exception as e:
                 print(f"Error during scraping: {e}")
+                path = await self.diagnostics.capture(page, 'browser', reason='error', error=repr(e))
+                if path:
+                    print(f"Saved diagnostic capture to {path}")
                 return []
             finally:
+                print(f"Blocked {filter_stats.requests_blocked} requests (~{filter_stats.bytes_saved // 1024} KB saved)")
                 await browser.close()
     
     async def _convert_share_url_to_cart_url(self, share_url: str) -> Optional[str]:
-        """Convert Shein share URL to actual cart landing URL"""
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-            
-            try:
-                await page.goto(share_url, timeout=10000)
-                content = await page.content()
-                await browser.close()
-                
-                # Look for shareInfo in JavaScript
-                match = re.search(r'var\s+shareInfo\s*=\s*({[^;]+});', content)
-                if match:
-                    share_info = json.loads(match.group(1))
-                    share_id = share_info.get('shareId') or share_info.get('id')
-                    local_country = share_info.get('localcountry', '')
-                    cart_share = share_info.get('cart_share', 1)
-                    
-                    if share_id:
-                        country_code = local_country.lower() if local_country else ''
-                        if country_code:
-                            base_url = f'https://m.shein.com/{country_code}/cart/share/landing'
-                        else:
-                            base_url = 'https://m.shein.com/cart/share/landing'
-                        
-                        params = {
-                            'group_id': share_id,
-                            'local_country': local_country,
-                            'url_from': '',
-                            'cart_share': cart_share
-                        }
-                        return f"{base_url}?{urlencode(params)}"
-            except Exception as e:
-                print(f"Error converting share URL: {e}")
-            finally:
-                if browser.is_connected():
-                    await browser.close()
+        """
+        Convert Shein share URL to actual cart landing URL
         
-        return None
+        The share page is plain HTML with a `var shareInfo`, so a regular HTTP
+        request is enough; no need to start a second browser for it.
+        """
+        parser = SheinCartScraper()
+        if self.http_client is None:
+            self.http_client = create_async_client(headers=parser.headers)
+        try:
+            response = await self.http_client.get(share_url)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"Error converting share URL: {e}")
+            return None
+        return parser._landing_url_from_share_page(response.text)
+    
+    async def aclose(self):
+        """Close the pooled HTTP client"""
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
     
     async def _extract_items_from_page(self, page) -> List[Dict[str, any]]:
         """Extract cart items from the loaded page using browser automation"""
         items = []
         
         try:
-            # Save screenshot for debugging
-            await page.screenshot(path='debug_screenshot.png')
-            print("Saved screenshot to debug_screenshot.png")
+            # Try to extract from JavaScript variables first; the search runs
+            # in the page so only the candidate list crosses over
+            candidates = await fetch_cart_candidates(page, JS_GLOBALS, name_fields=NAME_KEYS, keys=CART_KEYS, paths=CART_PATHS)
+            if candidates:
+                items = self._parse_item_list(candidates['items'])
+                if items:
+                    print(f"Found {len(items)} items from JavaScript data ({candidates['source']}.{candidates['path']})")
+                    return items
             
-            # Try to extract from JavaScript variables first
-            cart_data = await page.evaluate('''() => {
-                // Try to find cart data in common places
-                if (window.__NUXT__) return window.__NUXT__;
-                if (window.__INITIAL_STATE__) return window.__INITIAL_STATE__;
-                if (window.cartData) return window.cartData;
-                if (window.gbRawData) return window.gbRawData;
-                
-                // Check for data in script tags
+            # Check for data in script tags
+            script_html = await page.evaluate('''() => {
                 const scripts = document.querySelectorAll('script');
                 for (const script of scripts) {
                     const text = script.textContent;
                     if (text.includes('cartData') || text.includes('cartInfo')) {
-                        return text;
+                        return script.outerHTML;
                     }
                 }
                 return null;
             }''')
             
-            if cart_data:
-                if isinstance(cart_data, str):
-                    # If it's a string, try to parse it
-                    items = self._extract_from_html_content(cart_data)
-                else:
-                    items = self._parse_json_for_items(cart_data)
-                    
+            if script_html:
+                items = self._extract_from_html_content(script_html)
                 if items:
                     print(f"Found {len(items)} items from JavaScript data")
                     return items
@@ -323,12 +319,6 @@ class SheinCartScraperBrowser:
                 print(f"Found {len(items)} items from DOM elements")
                 return items
             
-            # Last resort: save HTML for manual inspection
-            html_content = await page.content()
-            with open('debug_page.html', 'w', encoding='utf-8') as f:
-                f.write(html_content)
-            print("Saved page HTML to debug_page.html for inspection")
-            
         except Exception as e:
             print(f"Error extracting items: {e}")
             import traceback
@@ -338,116 +328,36 @@ class SheinCartScraperBrowser:
     
     def _extract_from_html_content(self, html_content: str) -> List[Dict[str, any]]:
         """Fallback: Extract items from raw HTML content"""
-        items = []
+        _, assignments = find_embedded_state(html_content, names=('__NUXT__', '__INITIAL_STATE__', 'cartData'))
         
-        patterns = [
-            r'window\.__NUXT__\s*=\s*(.+?);',
-            r'window\.__INITIAL_STATE__\s*=\s*({.+?});',
-            r'var\s+cartData\s*=\s*({.+?});',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, html_content, re.DOTALL)
-            if match:
-                try:
-                    data = json.loads(match.group(1))
-                    items = self._parse_json_for_items(data)
-                    if items:
-                        break
-                except:
-                    continue
+        for _, text in assignments:
+            try:
+                items = self._parse_json_for_items(loads(text))
+            except ValueError:
+                continue
+            if items:
+                return items
         
-        return items
+        return []
     
     def _parse_json_for_items(self, data: any) -> List[Dict[str, any]]:
-        """Recursively search for cart items in JSON structure"""
-        items = []
-        
-        cart_keys = ['cart', 'cartItems', 'items', 'products', 'goods', 'cartGoods', 'productList', 'goodsList', 'cartInfo']
-        
-        if isinstance(data, dict):
-            for key in cart_keys:
-                if key in data and isinstance(data[key], list):
-                    for item in data[key]:
-                        if isinstance(item, dict):
-                            parsed_item = self._parse_item(item)
-                            if parsed_item:
-                                items.append(parsed_item)
-            
-            if not items:
-                for value in data.values():
-                    if isinstance(value, (dict, list)):
-                        nested_items = self._parse_json_for_items(value)
-                        items.extend(nested_items)
-                        if items:
-                            break
-        
-        elif isinstance(data, list):
-            for item in data:
-                if isinstance(item, dict):
-                    parsed_item = self._parse_item(item)
-                    if parsed_item:
-                        items.append(parsed_item)
-        
-        return items
+        """Search for cart items in JSON structure: known paths, then a bounded walk"""
+        return find_cart_items(data, self._parse_item_list, keys=CART_KEYS, paths=CART_PATHS)
     
-    def _parse_item(self, item: dict) -> Optional[Dict[str, any]]:
-        """Parse a single item from JSON data"""
-        product_info = {}
-        
-        # Product name/title
-        for key in ['name', 'title', 'productName', 'goodsName', 'goods_name', 'goods_title', 'productRelationID']:
-            if key in item and item[key]:
-                product_info['name'] = str(item[key])
-                break
-        
-        # Price
-        for key in ['price', 'salePrice', 'retailPrice', 'amount', 'unit_price', 'goods_price', 'unitPrice']:
-            if key in item and item[key]:
-                product_info['price'] = item[key]
-                break
-        
-        # Quantity
-        for key in ['quantity', 'qty', 'num', 'amount', 'goods_num']:
-            if key in item and item[key]:
-                product_info['quantity'] = item[key]
-                break
-        
-        # Image
-        for key in ['image', 'img', 'thumbnail', 'pic', 'goodsImg', 'goods_img', 'goods_image', 'goodsThumb']:
-            if key in item and item[key]:
-                product_info['image'] = item[key]
-                break
-        
-        # SKU/Product ID
-        for key in ['sku', 'id', 'productId', 'goodsId', 'goods_id', 'goods_sn', 'productRelationID']:
-            if key in item and item[key]:
-                product_info['sku'] = str(item[key])
-                break
-        
-        # Color/Size
-        if 'color' in item:
-            product_info['color'] = item['color']
-        if 'size' in item:
-            product_info['size'] = item['size']
-        
-        # Attributes
-        for key in ['attr', 'attributes', 'sku_info', 'skuInfo', 'attrInfo']:
-            if key in item and isinstance(item[key], (dict, list)):
-                product_info['attributes'] = item[key]
-                break
-        
-        return product_info if product_info else None
+    def _parse_item_list(self, values: list) -> List[Dict[str, any]]:
+        """Normalize the dicts of a candidate cart list (backend/item_schema.py)"""
+        return ITEM_SCHEMA.normalize_list(values)
 
 
 async def main():
     """Main function to run the scraper"""
     if len(sys.argv) < 2:
-        print("Usage: python scrape_shein_cart_browser.py <shein_cart_url> [--headless]")
+        print("Usage: python scrape_shein_cart_browser.py <shein_cart_url> [--headless] [--diagnostics]")
         print("\nExample:")
         print("  python scrape_shein_cart_browser.py https://www.shein.com/cart/...")
         print("  python scrape_shein_cart_browser.py https://api-shein.shein.com/h5/sharejump/appjump?link=...")
         print("  python scrape_shein_cart_browser.py <url> --headless  # Run in headless mode")
+        print("  python scrape_shein_cart_browser.py <url> --diagnostics  # Save HTML + screenshot if it fails")
         print("\nNote: By default, runs with visible browser to handle CAPTCHAs")
         sys.exit(1)
     
@@ -455,13 +365,16 @@ async def main():
     
     # Check for headless flag
     headless = '--headless' in sys.argv or '-h' in sys.argv
+    diagnostics = DiagnosticsStore(enabled='--diagnostics' in sys.argv)
     
     print(f"Scraping Shein cart URL: {url}")
     print(f"Mode: {'Headless' if headless else 'Visible Browser'}")
     print("-" * 60)
     
-    scraper = SheinCartScraperBrowser(headless=headless)
+    scraper = SheinCartScraperBrowser(headless=headless, diagnostics=diagnostics)
     items = await scraper.scrape_cart(url)
+    await scraper.aclose()
+    await diagnostics.drain()
     
     if items:
         print(f"\n✓ Found {len(items)} item(s) in cart:\n")
@@ -19,6 +19,13 @@ except ImportError:
     print("Then run: playwright install chromium")
     sys.exit(1)
 
+from backend.diagnostics import DiagnosticsStore
+from backend.item_schema import ItemSchema
+from backend.request_filter import RequestFilter
+
+diagnostics = DiagnosticsStore(enabled='--diagnostics' in sys.argv)
+ITEM_SCHEMA = ItemSchema()
+
 
 async def scrape_with_manual_captcha(url: str) -> List[Dict]:
     """
@@ -49,6 +56,9 @@ async def scrape_with_manual_captcha(url: str) -> List[Dict]:
             timezone_id='Africa/Johannesburg'
         )
         
+        # Drop trackers only: images and styles stay so CAPTCHAs can be solved
+        await RequestFilter(extensions=()).install(context)
+        
         page = await context.new_page()
         
         try:
@@ -80,18 +90,13 @@ async def scrape_with_manual_captcha(url: str) -> List[Dict]:
             # Small wait to ensure page is stable
             await asyncio.sleep(2)
             
-            # Take screenshot
-            await page.screenshot(path='final_screenshot.png')
-            print("📸 Screenshot saved to final_screenshot.png")
-            
             # Extract cart items
             items = await extract_cart_items(page)
             
-            # Save HTML for debugging
-            html = await page.content()
-            with open('final_page.html', 'w', encoding='utf-8') as f:
-                f.write(html)
-            print("💾 Page HTML saved to final_page.html")
+            if not items:
+                path = await diagnostics.capture(page, 'manual', reason='no_items')
+                if path:
+                    print(f"💾 Page HTML and screenshot saved to {path}")
             
             return items
             
@@ -99,6 +104,9 @@ async def scrape_with_manual_captcha(url: str) -> List[Dict]:
             print(f"❌ Error: {e}")
             import traceback
             traceback.print_exc()
+            path = await diagnostics.capture(page, 'manual', reason='error', error=repr(e))
+            if path:
+                print(f"💾 Page HTML and screenshot saved to {path}")
             return []
         finally:
             print("\n⏸️  Browser will close in 3 seconds...")
@@ -242,11 +250,7 @@ def parse_cart_data(data) -> List[Dict]:
             if key in data:
                 value = data[key]
                 if isinstance(value, list):
-                    for item in value:
-                        if isinstance(item, dict):
-                            parsed = parse_single_item(item)
-                            if parsed:
-                                items.append(parsed)
+                    items.extend(ITEM_SCHEMA.normalize_list(value))
                 elif isinstance(value, dict):
                     # Recursively check
                     items.extend(parse_cart_data(value))
@@ -261,11 +265,7 @@ def parse_cart_data(data) -> List[Dict]:
                         break
     
     elif isinstance(data, list):
-        for item in data:
-            if isinstance(item, dict):
-                parsed = parse_single_item(item)
-                if parsed:
-                    items.append(parsed)
+        items.extend(ITEM_SCHEMA.normalize_list(data))
     
     elif isinstance(data, str):
         # Try to find JSON in string
@@ -285,46 +285,9 @@ def parse_cart_data(data) -> List[Dict]:
     return items
 
 
-def parse_single_item(item: dict) -> dict:
-    """Parse a single cart item"""
-    result = {}
-    
-    # Name
-    for key in ['name', 'title', 'goodsName', 'goods_name', 'productName']:
-        if key in item and item[key]:
-            result['name'] = str(item[key])
-            break
-    
-    # Price
-    for key in ['price', 'salePrice', 'retailPrice', 'unit_price', 'unitPrice']:
-        if key in item and item[key]:
-            result['price'] = item[key]
-            break
-    
-    # Quantity
-    for key in ['quantity', 'qty', 'num', 'goods_num']:
-        if key in item and item[key]:
-            result['quantity'] = item[key]
-            break
-    
-    # Image
-    for key in ['image', 'img', 'thumbnail', 'goodsImg', 'goods_img']:
-        if key in item and item[key]:
-            result['image'] = item[key]
-            break
-    
-    # SKU
-    for key in ['sku', 'id', 'goodsId', 'goods_id', 'productId']:
-        if key in item and item[key]:
-            result['sku'] = str(item[key])
-            break
-    
-    return result if result else None
-
-
 async def main():
     if len(sys.argv) < 2:
-        print("Usage: python scrape_shein_manual.py <shein_cart_url>")
+        print("Usage: python scrape_shein_manual.py <shein_cart_url> [--diagnostics]")
         print("\nExample:")
         print("  python scrape_shein_manual.py https://m.shein.com/za/cart/share/landing?group_id=...")
         print("  python scrape_shein_manual.py https://api-shein.shein.com/h5/sharejump/appjump?link=...")
@@ -336,6 +299,7 @@ async def main():
     print("Note: The script will follow any redirects automatically\n")
     
     items = await scrape_with_manual_captcha(url)
+    await diagnostics.drain()
     
     if items:
         print(f"\n{'='*70}")
@@ -356,7 +320,10 @@ async def main():
         print("  • Did you solve all CAPTCHAs?")
         print("  • Is the cart page fully loaded?")
         print("  • Does the cart actually have items?")
-        print("\nCheck final_screenshot.png and final_page.html for debugging")
+        if diagnostics.enabled:
+            print(f"\nCheck the capture in {diagnostics.directory}/ for debugging")
+        else:
+            print("\nRun again with --diagnostics to save the page HTML and a screenshot")
         return 1
 
 